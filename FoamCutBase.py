@@ -75,6 +75,9 @@ class FoamCutMovementBaseObject(FoamCutBaseObject):
         obj.addProperty("App::PropertyDistance",    "LeftSegmentLength",    "Information", "Left Segment length",   1)
         obj.addProperty("App::PropertyDistance",    "RightSegmentLength",   "Information", "Right Segment length",   1)
         obj.addProperty("App::PropertyLength",      "DiscretizationStep",   "Information", "Discretization step")
+        obj.addProperty("App::PropertyLength",      "ChordTolerance",       "Information", "Max distance between source edge and path segment. 0 - use fixed discretization step")
+        obj.addProperty("App::PropertyLength",      "MinDiscretizationStep", "Information", "Min distance between points of adaptive discretization")
+        obj.addProperty("App::PropertyLength",      "MaxDiscretizationStep", "Information", "Max distance between points of adaptive discretization")
         obj.addProperty("App::PropertyInteger",     "PointsCount",          "Information", "Number of points", 1)
 
         obj.addProperty("App::PropertyDistance",    "LeftEdgeLength",     "", "", 5) 
@@ -88,6 +91,9 @@ class FoamCutMovementBaseObject(FoamCutBaseObject):
         obj.CompensationDirection = 0 # Normal compensation by default
 
         obj.setExpression(".DiscretizationStep", u"<<{}>>.DiscretizationStep".format(configName))
+        obj.setExpression(".ChordTolerance", u"<<{}>>.ChordTolerance".format(configName))
+        obj.setExpression(".MinDiscretizationStep", u"<<{}>>.MinDiscretizationStep".format(configName))
+        obj.setExpression(".MaxDiscretizationStep", u"<<{}>>.MaxDiscretizationStep".format(configName))
 
         obj.setEditorMode("PauseDuration", 3)
 
@@ -116,6 +122,16 @@ class FoamCutMovementBaseObject(FoamCutBaseObject):
             obj.addProperty("App::PropertyBool",        "RapidMove",            "Task", "Move trough this segment with rapid movement speed").RapidMove = False
             print("{} - Migrating from 0.1.9 to 0.1.10 - adding RapidMove property.".format(obj.Label))  
             touched = True
+        if not hasattr(obj, "ChordTolerance"):
+            configName = self.getConfigName(obj)
+            obj.addProperty("App::PropertyLength",      "ChordTolerance",       "Information", "Max distance between source edge and path segment. 0 - use fixed discretization step")
+            obj.addProperty("App::PropertyLength",      "MinDiscretizationStep", "Information", "Min distance between points of adaptive discretization").MinDiscretizationStep = 0.05
+            obj.addProperty("App::PropertyLength",      "MaxDiscretizationStep", "Information", "Max distance between points of adaptive discretization").MaxDiscretizationStep = 5.0
+            obj.setExpression(".ChordTolerance", u"<<{}>>.ChordTolerance".format(configName))
+            obj.setExpression(".MinDiscretizationStep", u"<<{}>>.MinDiscretizationStep".format(configName))
+            obj.setExpression(".MaxDiscretizationStep", u"<<{}>>.MaxDiscretizationStep".format(configName))
+            print("{} - Migrating from 0.1.12 to 0.1.13 - adding adaptive discretization properties.".format(obj.Label))
+            touched = True
         if touched:
             obj.recompute()
 
@@ -233,11 +249,12 @@ class FoamCutMovementBaseObject(FoamCutBaseObject):
     def createShape(self, obj, edges, planes, color):
         # - Make path between objects on working planes
         discretizationStep = obj.DiscretizationStep if obj.DiscretizationStep > 0 else 0.5
+        adaptive = (float(obj.ChordTolerance), float(obj.MinDiscretizationStep), float(obj.MaxDiscretizationStep))
         if len(edges) == 2:
             isLine = isStraitLine(edges[0]) and isStraitLine(edges[1])
-            (path_points, inverted, points_count) = makePathPointsByEdgesOrVerticesPair(edges[0], edges[1], planes, discretizationStep, isLine)
+            (path_points, inverted, points_count) = makePathPointsByEdgesOrVerticesPair(edges[0], edges[1], planes, discretizationStep, isLine, *adaptive)
         elif len(edges) == 1:
-            (path_points, inverted, points_count) = makePathPointsByEdgeOrVertex(edges[0], planes, discretizationStep, isStraitLine(edges[0]))
+            (path_points, inverted, points_count) = makePathPointsByEdgeOrVertex(edges[0], planes, discretizationStep, isStraitLine(edges[0]), *adaptive)
         else:
             raise Exception(f"ERROR: Not supported number of edges: {len(edges)}.\n")
 
@@ -282,16 +299,16 @@ class FoamCutMovementBaseObject(FoamCutBaseObject):
                     
                     r_points = [minZ, maxZ]
 
-            # - Create path for L
+            # - Create path for L as single polyline edge
             path_L = Part.BSplineCurve()
-            path_L.approximate(Points = l_points, Continuity="C0")
+            path_L.buildFromPoles(l_points, False, 1)
 
-            # - Create path for R
+            # - Create path for R as single polyline edge
             path_R = Part.BSplineCurve()
-            path_R.approximate(Points = r_points, Continuity="C0")
+            path_R.buildFromPoles(r_points, False, 1)
             
-            obj.LeftSegmentLength = float(path_L.length())
-            obj.RightSegmentLength = float(path_R.length())
+            obj.LeftSegmentLength = getPolylineLength(l_points)
+            obj.RightSegmentLength = getPolylineLength(r_points)
 
             if len(edges) == 1:
                 obj.LeftEdgeLength = obj.RightEdgeLength = edges[0].Length
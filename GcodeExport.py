@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+__title__ = "Export Gcode"
+__author__ = "Andrew Shkolik"
+__license__ = "LGPL 2.1"
+__doc__ = "Export Gcode from routes of the FreeCAD document without GUI."
+__usage__ = """FreeCADCmd GcodeExport.py --pass <document.FCStd> <output> [Route ...] [--job <Job>] [--separate]
+
+    document.FCStd  - FreeCAD document with FoamCut job
+    output          - output .gcode file, or output directory when --separate is used
+    Route           - names or labels of routes to export in order of cutting. All routes of the job by default
+    --job           - name or label of the job. Required when document has several jobs and no routes are given
+    --separate      - write each route into its own file <output>/<RouteLabel>.gcode"""
+
+import os
+import sys
+
+# - make workbench modules importable when script started directly by FreeCADCmd
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import FreeCAD
+App=FreeCAD
+import GcodeGenerator
+
+def getScriptArguments(argv):
+    '''
+    Get script arguments from command line.
+    FreeCADCmd pass own arguments to the script, so take only arguments after --pass or script name.
+    @param argv - command line arguments
+    @returns list of script arguments
+    '''
+    if "--pass" in argv:
+        return argv[argv.index("--pass") + 1:]
+
+    for i, arg in enumerate(argv):
+        if os.path.basename(arg) == os.path.basename(__file__):
+            return argv[i + 1:]
+
+    return argv[1:]
+
+def findObject(doc, name, type):
+    '''
+    Find FoamCut object in the document by name or label
+    @param doc - FreeCAD document
+    @param name - name or label of the object
+    @param type - FoamCut type of the object
+    @returns object or None
+    '''
+    obj = doc.getObject(name)
+    if obj is None:
+        found = doc.getObjectsByLabel(name)
+        obj = found[0] if len(found) > 0 else None
+
+    return obj if obj is not None and hasattr(obj, "Type") and obj.Type == type else None
+
+def findRoutes(doc, names, jobName = None):
+    '''
+    Find routes in the document
+    @param doc - FreeCAD document
+    @param names - list of routes names or labels. If empty, all routes of the job will be returned
+    @param jobName - name or label of the job, or None to use the only job of the document
+    @returns list of Route objects
+    '''
+    job = None
+    if jobName is not None:
+        job = findObject(doc, jobName, "Job")
+        if job is None:
+            raise Exception("ERROR: Job [{}] not found in document.".format(jobName))
+
+    if len(names) == 0:
+        return [obj for obj in doc.Objects if hasattr(obj, "Type") and obj.Type == "Route" and (job is None or obj.JobName == job.Name)]
+
+    routes = []
+    for name in names:
+        route = findObject(doc, name, "Route")
+        if route is None or (job is not None and route.JobName != job.Name):
+            raise Exception("ERROR: Route [{}] not found in {}.".format(name, "job [{}]".format(job.Label) if job is not None else "document"))
+        routes.append(route)
+
+    return routes
+
+def main(argv):
+    args = getScriptArguments(argv)
+
+    separate = "--separate" in args
+    args = [arg for arg in args if arg != "--separate"]
+
+    jobName = None
+    if "--job" in args:
+        i = args.index("--job")
+        if i + 1 >= len(args):
+            print(__usage__)
+            return 1
+        jobName = args[i + 1]
+        args = args[:i] + args[i + 2:]
+
+    if len(args) < 2:
+        print(__usage__)
+        return 1
+
+    doc_path, out_path, names = args[0], args[1], args[2:]
+
+    doc = None
+    try:
+        doc = App.openDocument(doc_path)
+        routes = findRoutes(doc, names, jobName)
+
+        if len(routes) == 0:
+            raise Exception("ERROR: No routes found in document [{}].".format(doc_path))
+
+        # - routes of different jobs use different machine configs, so they can't be exported together
+        jobs = sorted(set(route.JobName for route in routes))
+        if len(jobs) > 1:
+            print("ERROR: Routes belong to several jobs [{}], select one with --job.".format(", ".join(jobs)))
+            print(__usage__)
+            return 1
+
+        if separate:
+            os.makedirs(out_path, exist_ok=True)
+            for route in routes:
+                path = GcodeGenerator.generate_gcode([route], None, os.path.join(out_path, route.Label + ".gcode"))
+                print("GCODE saved into [%s]" % path)
+        else:
+            path = GcodeGenerator.generate_gcode(routes, None, out_path)
+            print("GCODE saved into [%s]" % path)
+    except Exception as e:
+        App.Console.PrintError("{}\n".format(e))
+        return 1
+    finally:
+        if doc is not None:
+            App.closeDocument(doc.Name)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
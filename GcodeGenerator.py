@@ -0,0 +1,1224 @@
+# -*- coding: utf-8 -*-
+
+__title__ = "Gcode generator"
+__author__ = "Andrew Shkolik & Andrei Bezborodov"
+__license__ = "LGPL 2.1"
+__doc__ = "Generate Gcode from routes. Doesn't depend on GUI, so could be used from FreeCADCmd."
+
+import FreeCAD
+App=FreeCAD
+import utilities
+import numpy as np
+import multiprocessing
+import json
+import os
+import re
+
+GCODE_CHUNK_LINES   = 4096          # - Number of lines buffered before chunk is yielded to the file
+GCODE_WRITE_BUFFER  = 1024 * 1024   # - Output file buffer size
+
+GCODE_PLACEHOLDER   = re.compile(r"\{([^{}]*)\}")
+
+# - Commands compiled into templates and placeholders supported by each of them
+GCODE_TEMPLATES = {
+    "CutCommand":           ["Position", "FeedRate", "WirePower"],
+    "MoveCommand":          ["Position", "FeedRate", "WirePower"],
+    "PauseCommand":         ["Duration"],
+    "WireOnCommand":        ["WirePower"],
+    "InitPositionCommand":  ["Position"],
+    "ArcCWCommand":         ["Position", "I1", "J1", "I2", "J2", "FeedRate", "WirePower"],
+    "ArcCCWCommand":        ["Position", "I1", "J1", "I2", "J2", "FeedRate", "WirePower"],
+}
+
+PARALLEL_GCODE_MIN_POINTS = 20000   # - Min total count of routes points to generate routes in worker processes, smaller programs are faster in current process
+
+INVERSE_TIME_MIN_LENGTH = 0.01      # - Shorter moves are timed as moves of this length in inverse time mode
+INVERSE_TIME_FORMAT     = "%.3f"    # - Format of inverse time feed words
+
+ARC_MIN_POINTS      = 4             # - Minimum number of points replaced by arc (3 segments)
+ARC_MAX_RADIUS      = 10000.0       # - Arcs of bigger radius are treated as lines
+ARC_MIN_CHORD       = 0.05          # - Arcs with shorter chord are ambiguous after rounding of coordinates
+ARC_MAX_SWEEP       = np.pi         # - Maximum arc sweep angle
+
+class GcodeTemplate():
+    """
+    Command compiled once per export.
+    Command string is split into literal parts and placeholder slots, so filling slots doesn't rescan the string.
+    """
+
+    def __init__(self, name, command, placeholders):
+        parts = GCODE_PLACEHOLDER.split(str(command))
+
+        self.Name = name
+        self.Literals = parts[0::2]
+        self.Slots = parts[1::2]
+
+        unknown = [slot for slot in self.Slots if slot not in placeholders]
+        if len(unknown) > 0:
+            raise Exception("ERROR: Unknown placeholder {} in {}. Supported placeholders: {}".format(
+                ", ".join("{" + slot + "}" for slot in unknown), name, ", ".join("{" + slot + "}" for slot in placeholders)))
+
+    def fill(self, **values):
+        '''
+        Fill slots with values. Missing values are replaced with empty string.
+        @param values - string value for each slot
+        @returns command line
+        '''
+        result = [self.Literals[0]]
+        for slot, literal in zip(self.Slots, self.Literals[1:]):
+            result.append(values.get(slot, ""))
+            result.append(literal)
+        return "".join(result)
+
+    def makeFormat(self, **formats):
+        '''
+        Make %-format for the command, so run of commands could be formatted in one pass.
+        Literal parts are escaped, formats are put into slots as is.
+        @param formats - %-format for each slot
+        @returns format string
+        '''
+        result = [self.Literals[0].replace("%", "%%")]
+        for slot, literal in zip(self.Slots, self.Literals[1:]):
+            result.append(formats.get(slot, ""))
+            result.append(literal.replace("%", "%%"))
+        return "".join(result)
+
+GCODE_WORD          = re.compile(r"([A-Za-z]+)([-+]?[0-9]*\.?[0-9]+)")
+GCODE_LINE          = re.compile(r"(?:\s*[A-Za-z]+[-+]?[0-9]*\.?[0-9]+)*\s*")
+GCODE_MOTION_MODES  = (0.0, 1.0, 2.0, 3.0)  # - G00, G01, G02, G03
+GCODE_ARC_WORDS     = ("I", "J", "K", "L", "R")  # - Arc words are not modal
+
+class GcodeOptimizer():
+    """
+    Optimizer of the generated Gcode.
+    Tracks modal state of the machine (motion mode, feed rate, wire power and position), 
+    drops words that don't change the state and moves of zero length.
+    Lines it doesn't understand are passed as is.
+    """
+
+    def __init__(self, config):
+        self.Axes = set(str(name).upper() for name in (config.X1AxisName, config.Z1AxisName, config.X2AxisName, config.Z2AxisName, config.R1AxisName))
+        self.InverseTime = False
+        self.reset()
+
+    def reset(self):
+        '''
+        Forget machine state
+        '''
+        self.Motion = None
+        self.Feed = None
+        self.Power = None
+        self.Position = {}
+
+    def optimizeLine(self, line):
+        '''
+        Optimize single line of Gcode
+        @param line - line without line end
+        @returns optimized line or None if line should be dropped
+        '''
+        code = line.strip()
+        if len(code) == 0 or code[0] in ";(%":
+            return line
+
+        if code[0] == "$":
+            # - GRBL system command (i.e. homing), machine position is unknown after it
+            self.reset()
+            return line
+
+        # - Split inline comment
+        comment = ""
+        marks = [index for index in (code.find(";"), code.find("(")) if index >= 0]
+        if len(marks) > 0:
+            code, comment = code[:min(marks)].rstrip(), code[min(marks):]
+
+        if GCODE_LINE.fullmatch(code) is None:
+            self.reset()
+            return line
+
+        words = []
+        motion = []
+        optimizable = True
+        is_arc = False
+        for letter, value in GCODE_WORD.findall(code):
+            upper = letter.upper()
+            number = float(value)
+            words.append((letter + value, upper, number))
+
+            if upper == "G":
+                if number in GCODE_MOTION_MODES:
+                    motion.append(number)
+                else:
+                    optimizable = False
+            elif upper in GCODE_ARC_WORDS:
+                is_arc = True
+            elif upper not in self.Axes and upper != "F" and upper != "S":
+                optimizable = False
+
+        if not optimizable:
+            # - Keep line as is and only follow the state
+            for text, letter, value in words:
+                if letter == "G" and value in (93.0, 94.0):
+                    self.InverseTime = value == 93.0
+                    self.Feed = None
+                elif letter == "G" and value not in GCODE_MOTION_MODES and value != 4.0:
+                    # - Coordinate system or position could be changed
+                    self.Position = {}
+                elif letter == "F":
+                    self.Feed = value
+                elif letter == "S":
+                    self.Power = value
+                elif letter in self.Axes:
+                    self.Position = {}
+            if len(motion) > 0:
+                self.Motion = motion[-1]
+            return line
+
+        # - Drop move of zero length
+        if not is_arc:
+            target = [(letter, value) for text, letter, value in words if letter in self.Axes]
+            if len(target) > 0 and all(self.Position.get(axis) == value for axis, value in target):
+                return None
+
+        result = []
+        for text, letter, value in words:
+            if letter == "G":
+                if value == self.Motion:
+                    continue
+                self.Motion = value
+            elif letter == "F":
+                # - Inverse time mode require feed rate in each block
+                if value == self.Feed and not self.InverseTime:
+                    continue
+                self.Feed = value
+            elif letter == "S":
+                if value == self.Power:
+                    continue
+                self.Power = value
+            elif letter in self.Axes:
+                if self.Position.get(letter) == value and not is_arc:
+                    continue
+                self.Position[letter] = value
+            result.append(text)
+
+        if len(result) == 0:
+            return None
+
+        if len(comment) > 0:
+            result.append(comment)
+
+        return " ".join(result)
+
+def fitArcs(points, tolerance):
+    '''
+    Fit arcs into batch of planar point sets. Arc is a circle through first, middle and last point of the set.
+    @param points - (B, M, 2) array of points
+    @param tolerance - max distance of the points from the arc
+    @returns (centers, radii, angles, valid) where angles - (B, M) signed angles of the points from the first one
+    '''
+    a = points[:, 0]
+    b = points[:, points.shape[1] // 2]
+    c = points[:, -1]
+
+    ba = b - a
+    ca = c - a
+    d = 2.0 * (ba[:, 0] * ca[:, 1] - ba[:, 1] * ca[:, 0])
+    valid = np.abs(d) > 1e-9
+    d = np.where(valid, d, 1.0)
+
+    ba2 = (ba ** 2).sum(axis=1)
+    ca2 = (ca ** 2).sum(axis=1)
+    offsets = np.column_stack(((ca[:, 1] * ba2 - ba[:, 1] * ca2) / d, (ba[:, 0] * ca2 - ca[:, 0] * ba2) / d))
+    centers = a + offsets
+    radii = np.hypot(offsets[:, 0], offsets[:, 1])
+
+    vectors = points - centers[:, None, :]
+    deviations = np.abs(np.hypot(vectors[..., 0], vectors[..., 1]) - radii[:, None]).max(axis=1)
+
+    # - signed angle of each step
+    v1 = vectors[:, :-1]
+    v2 = vectors[:, 1:]
+    steps = np.arctan2(v1[..., 0] * v2[..., 1] - v1[..., 1] * v2[..., 0], (v1 * v2).sum(axis=2))
+    angles = np.concatenate((np.zeros((len(points), 1)), np.cumsum(steps, axis=1)), axis=1)
+
+    valid &= radii < ARC_MAX_RADIUS
+    valid &= ca2 > ARC_MIN_CHORD ** 2
+    valid &= deviations <= tolerance
+    valid &= np.all(steps > 0, axis=1) | np.all(steps < 0, axis=1)
+    valid &= np.abs(angles[:, -1]) <= ARC_MAX_SWEEP
+
+    return centers, radii, angles, valid
+
+def fitArcPairs(points_l, points_r, tolerance):
+    '''
+    Fit pairs of arcs into batch of left and right point sets.
+    Both arcs should have the same direction, and each pair of points should be at the same fraction of the arcs,
+    since controller interpolates both arcs synchronously.
+    @param points_l - (B, M, 2) array of left points
+    @param points_r - (B, M, 2) array of right points
+    @param tolerance - max distance of the points from the arcs
+    @returns (centers_l, centers_r, ccw, valid)
+    '''
+    centers_l, radii_l, angles_l, valid_l = fitArcs(points_l, tolerance)
+    centers_r, radii_r, angles_r, valid_r = fitArcs(points_r, tolerance)
+
+    sweep_l = angles_l[:, -1]
+    sweep_r = angles_r[:, -1]
+
+    valid = valid_l & valid_r & (np.sign(sweep_l) == np.sign(sweep_r))
+    sweep_l = np.where(valid, sweep_l, 1.0)
+    sweep_r = np.where(valid, sweep_r, 1.0)
+
+    length = np.maximum(radii_l * np.abs(sweep_l), radii_r * np.abs(sweep_r))
+    mismatch = np.abs(angles_l / sweep_l[:, None] - angles_r / sweep_r[:, None]) * length[:, None]
+    valid &= mismatch.max(axis=1) <= tolerance
+
+    return centers_l, centers_r, sweep_l > 0, valid
+
+def findArcs(points_l, points_r, tolerance):
+    '''
+    Find runs of points where both sides could be replaced by arcs
+    @param points_l - (N, 2) array of left points in the working plane
+    @param points_r - (N, 2) array of right points in the working plane
+    @param tolerance - max distance of the points from the arcs
+    @returns list of (start, end, center_l, center_r, ccw), where arc goes from start to end point
+    '''
+    count = len(points_l)
+    if count < ARC_MIN_POINTS:
+        return []
+
+    # - Check all shortest arcs in one pass, longer arcs could start only from them
+    windows = np.arange(count - ARC_MIN_POINTS + 1)[:, None] + np.arange(ARC_MIN_POINTS)
+    candidates = fitArcPairs(points_l[windows], points_r[windows], tolerance)[3]
+
+    arcs = []
+    start = 0
+    while start <= count - ARC_MIN_POINTS:
+        if not candidates[start]:
+            start += 1
+            continue
+
+        # - Grow arc exponentially until it doesn't fit, then bisect the longest fitting one
+        good = start + ARC_MIN_POINTS - 1
+        bad = count
+        step = ARC_MIN_POINTS
+        fit = None
+        while bad - good > 1:
+            end = min(good + step, count - 1) if bad == count else (good + bad) // 2
+            result = fitArcPairs(points_l[None, start:end + 1], points_r[None, start:end + 1], tolerance)
+            if result[3][0]:
+                good = end
+                fit = result
+                step *= 2
+            else:
+                bad = end
+
+        if fit is None:
+            fit = fitArcPairs(points_l[None, start:good + 1], points_r[None, start:good + 1], tolerance)
+
+        arcs.append((start, good, fit[0][0], fit[1][0], bool(fit[2][0])))
+        start = good
+
+    return arcs
+
+def getArcCenterOffset(start, end, center):
+    '''
+    Get arc center offset from the start point.
+    Center is moved onto bisector of the chord, so radius at start and end are the same.
+    @param start - start point
+    @param end - end point
+    @param center - center of the arc
+    @returns (I, J) offset
+    '''
+    middle = (start + end) / 2.0
+    chord = end - start
+    normal = np.array([-chord[1], chord[0]]) / np.hypot(chord[0], chord[1])
+
+    return middle + normal * np.dot(center - middle, normal) - start
+
+class GcodeStats():
+    """
+    Statistics of the generated route or whole program.
+    Lengths are in mm, times are in seconds.
+    """
+
+    def __init__(self, label):
+        self.Label = label
+        self.Lines = 0
+        self.CutLengthLeft = 0.0
+        self.CutLengthRight = 0.0
+        self.RapidLengthLeft = 0.0
+        self.RapidLengthRight = 0.0
+        self.CutTime = 0.0
+        self.RapidTime = 0.0
+        self.PauseTime = 0.0
+        self.MaxWireStretch = None
+
+    def add(self, other):
+        '''
+        Add statistics of the route to the program statistics
+        '''
+        for name in ["Lines", "CutLengthLeft", "CutLengthRight", "RapidLengthLeft", "RapidLengthRight", "CutTime", "RapidTime", "PauseTime"]:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+        if other.MaxWireStretch is not None:
+            self.MaxWireStretch = other.MaxWireStretch if self.MaxWireStretch is None else max(self.MaxWireStretch, other.MaxWireStretch)
+
+    def toDict(self):
+        result = dict(vars(self))
+        result["TotalTime"] = self.CutTime + self.RapidTime + self.PauseTime
+        return result
+
+class GcodeConfig():
+    """
+    Plain copy of machine configuration. 
+    Doesn't reference document objects, so could be used in worker processes.
+    """
+
+    def __init__(self, config):
+        names = config.PropertiesList if hasattr(config, "PropertiesList") else list(vars(config))
+        for name in names:
+            value = getattr(config, name)
+            if isinstance(value, (bool, int, float, str)):
+                setattr(self, name, value)
+            elif hasattr(value, "Unit"):
+                # - quantity
+                setattr(self, name, float(value))
+
+class GcodeItemSnapshot():
+    """
+    Plain copy of route data item
+    """
+
+    def __init__(self, object, config, feed_override, points_count):
+        self.Type = object.Type
+        self.Label = object.Label
+        self.PointsCount = points_count
+
+        if object.Type == "Rotation":
+            self.Angle = float(object.Angle)
+            return
+
+        self.Feed = utilities.getObjectFeedRate(object, config, feed_override)
+
+        self.Power = float(object.WirePower) if hasattr(object, "WirePower") and object.WirePower > 0 else float(config.WireMinPower)
+        self.RapidMove = object.RapidMove if hasattr(object, "RapidMove") else False
+        self.LeadInEnabled = object.Type == "Enter" and object.LeadInEnabled
+        self.LeadOutEnabled = object.Type == "Exit" and object.LeadOutEnabled
+
+        addPause = object.AddPause if hasattr(object, "AddPause") else False
+        self.PauseDuration = float(object.PauseDuration) if addPause and hasattr(object, "PauseDuration") else 0.0
+
+class GcodeRouteSnapshot():
+    """
+    Plain copy of route: offset points as arrays and data items.
+    Doesn't reference document objects, so could be passed to worker processes.
+    """
+
+    def __init__(self, route, config):
+        self.Label = route.Label
+        self.Offset_L = utilities.vectorsToArray(route.Offset_L)
+        self.Offset_R = utilities.vectorsToArray(route.Offset_R)
+
+        # - rotation axis position at the route start
+        self.RotationPosition = 0.0
+
+        # - machine position before the route start as pair of (3,) arrays of left and right points, None if unknown
+        self.StartPosition = None
+
+        # - simplified routes store own points counts
+        points_counts = route.PointsCounts if hasattr(route, "PointsCounts") and len(route.PointsCounts) == len(route.Data) \
+            else utilities.getRoutePointsCounts(route.Data, route.Objects)
+
+        self.Items = [GcodeItemSnapshot(route.Objects[object_index], config, route.FeedOverrides[i], points_counts[i]) 
+                      for i, object_index in enumerate(route.Data)]
+
+        # - planned feed rates of moves
+        self.Feeds = self.planFeeds(config)
+
+    def planFeeds(self, config):
+        '''
+        Plan feed rate of the move to each route point with current machine config. Longer side of each move travels 
+        with nominal feed rate of the item, but not faster than speed limits of machine axes.
+        Nominal feed rates are assigned to points ranges of items, points out of items ranges get FeedRateCut
+        @param config - machine config
+        @returns (N) array of feed rates
+        '''
+        count = len(self.Offset_L)
+        nominal = np.full(count, float(config.FeedRateCut))
+
+        start = 0
+        for item in self.Items:
+            if item.PointsCount > 0:
+                nominal[start:start + item.PointsCount] = item.Feed
+                start += item.PointsCount
+
+        if start != count:
+            App.Console.PrintWarning("Warning:\n Route {} has {} points, but its objects have {}. Feed rates of unmatched points are planned with FeedRateCut, recompute the route.\n".format(
+                self.Label, count, start))
+
+        limits = [float(getattr(config, axis + "MaxFeedRate", 0.0)) for axis in ["X1", "Z1", "X2", "Z2"]]
+
+        return utilities.planFeedRates(self.Offset_L, self.Offset_R, nominal, limits)
+
+# - Generator, route snapshots and config inherited by forked worker processes
+GCODE_WORKER_STATE = None
+
+def generateRouteInWorker(index):
+    '''
+    Generate GCODE of the route in worker process
+    @param index - index of the route snapshot
+    @returns tuple of GCODE and statistics of the route
+    '''
+    generator, snapshots, config = GCODE_WORKER_STATE
+    gcode = "".join(generator.generateRoute(config, snapshots[index]))
+    return (gcode, generator.stats)
+
+class GcodeGenerator():
+    """Generate Gcode from routes without any GUI interaction"""
+
+    '''
+    Compile configuration commands into templates
+    '''
+    def compileTemplates(self, config):
+        self.templates = {}
+        for name, placeholders in GCODE_TEMPLATES.items():
+            if hasattr(config, name):
+                self.templates[name] = GcodeTemplate(name, getattr(config, name), placeholders)
+
+        # - inverse time mode requires feed word on every cutting move
+        if hasattr(config, "FeedMode") and config.FeedMode == utilities.FC_FEED_MODES[1]: #["Units per minute", "Inverse time"]
+            names = ["CutCommand"] + (["ArcCWCommand", "ArcCCWCommand"] if hasattr(config, "ArcFitting") and config.ArcFitting else [])
+            for name in names:
+                if name in self.templates and "FeedRate" not in self.templates[name].Slots:
+                    raise Exception("ERROR: {} should contain {{FeedRate}} placeholder in Inverse time feed mode.".format(name))
+
+    '''
+    Makes commented line 
+    '''
+    def makeCommentedLine(self, config, inputString):
+        if config.CommentStyle == utilities.FC_COMMENT_STYLES[0]: # inline comments started with ;
+            return "; {}".format(inputString)
+        elif config.CommentStyle == utilities.FC_COMMENT_STYLES[1]: # inline or multiline comment inside ()
+            return "({})".format(inputString)
+        else:
+            return ""
+
+    '''
+    Generate position string for travel
+    '''
+    def generateTravelPosition(self, config, X1, Z1, X2, Z2):
+        return "%s%.2f %s%.2f %s%.2f %s%.2f" % (
+            config.X1AxisName, float(X1) - float(config.OriginX),
+            config.Z1AxisName, float(Z1),
+            config.X2AxisName, float(X2) - float(config.OriginX),
+            config.Z2AxisName, float(Z2)
+            )
+
+    '''
+    Generate rotation position
+    '''
+    def generateRotationPosition(self, config, angle):
+        self.rotation_position += float(angle)
+
+        return "%s%.2f" % (
+            config.R1AxisName, self.rotation_position
+        )
+
+    '''
+    Generate travel
+    '''
+    def generateTravel(self, config, template, feed_rate, wire_power, X1, Z1, X2, Z2):
+        # - Create position
+        position = self.generateTravelPosition(config, X1, Z1, X2, Z2)
+
+        # - Create GCODE
+        return template.fill(Position=position, FeedRate="%.2f" %  (float(feed_rate) * 60), WirePower=str(wire_power)) + "\n"
+
+    '''
+    Generate rapid travel
+    '''
+    def generateRapidTravel(self, config, X1, Z1, X2, Z2):        
+        # - Create GCODE
+        return self.generateTravel(config, self.templates["MoveCommand"], config.FeedRateMove, '', X1, Z1, X2, Z2)
+
+    '''
+    Generate pause
+    '''
+    def generatePause(self, template, duration):
+        return template.fill(Duration="%.2f" %  float(duration)) + "\n"
+
+    '''
+    Generate rotation
+    '''
+    def generateRotation(self, config, template, angle, feed_rate):
+        # - Create position
+        position = self.generateRotationPosition(config, angle)
+
+        # - Create GCODE
+        return template.fill(Position=position, FeedRate="%.2f" %  (float(feed_rate) * 60)) + "\n"
+
+    '''
+    Generate wire enable command
+    '''
+    def generateWireEnable(self, config, power):
+        return self.templates["WireOnCommand"].fill(WirePower="%.2f" % float(power)) + "\n"
+
+    '''
+    Generate wire disable command
+    '''
+    def generateWireDisable(self, config):
+        return config.WireOffCommand + "\n"
+
+    '''
+    Generate command for compensated power
+    '''
+    def generateWireCompensatedPower(self, config, wire_length, min_power):
+        max_power   = float(config.WireMaxPower)
+        min_length  = float(config.FieldWidth)
+
+        # - Calculate power
+        power = (min_power * wire_length) / min_length
+
+        # - Clip power
+        if power > max_power:
+            power = max_power
+
+        return power
+        
+    def generateStartBlock(self, config, start_point):
+        GCODE = ""
+        self.rotation_position = 0.0
+
+        if config.StartProgramCode:
+            GCODE += "{}\n".format(config.StartProgramCode)
+            GCODE += "\n"
+
+        GCODE += self.makeCommentedLine(config, "*** MACHINE ***") + "\n"
+        GCODE += self.makeCommentedLine(config, "Machine type: {}".format("5-Axis" if config.FiveAxisMachine else "4-Axis")) + "\n"
+        GCODE += self.makeCommentedLine(config, "Width: {}".format(config.FieldWidth)) + "\n"
+        GCODE += self.makeCommentedLine(config, "Length: {}".format(config.HorizontalTravel)) + "\n"
+        GCODE += self.makeCommentedLine(config, "Height: {}".format(config.VerticalTravel)) + "\n"
+        GCODE += "\n"
+
+        GCODE += self.makeCommentedLine(config, "*** FOAM BLOCK ***") + "\n"
+
+        GCODE += self.makeCommentedLine(config, "Width: {}".format(config.BlockWidth)) + "\n"
+        GCODE += self.makeCommentedLine(config, "Length: {}".format(config.BlockLength)) + "\n"
+        GCODE += self.makeCommentedLine(config, "Height: {}".format(config.BlockHeight)) + "\n"
+
+        GCODE += self.makeCommentedLine(config, "Position - Left-Bottom-Front corner in relation to the origin") + "\n"
+        GCODE += self.makeCommentedLine(config, "Position.X: {}".format(config.BlockPosition.x)) + "\n"
+        GCODE += self.makeCommentedLine(config, "Position.Y: {}".format(config.BlockPosition.y)) + "\n"
+        GCODE += self.makeCommentedLine(config, "Position.Z: {}".format(config.BlockPosition.z)) + "\n"
+        
+        GCODE += "\n"
+        GCODE += self.makeCommentedLine(config, "*** START BLOCK ***") + "\n"
+
+        GCODE += self.makeCommentedLine(config, "Set units to millimeters") + "\n"
+        GCODE += "G21\n"
+        GCODE += self.makeCommentedLine(config, "Set absolute positioning") + "\n"
+        GCODE += "G90\n"
+
+        if config.EnableHoming:
+            # - Homing
+            GCODE += self.makeCommentedLine(config, "- Homing -") + "\n"
+            GCODE += config.HomingCommand + "\n"
+
+            initPosCommand = self.generateTravelPosition(config,
+                config.HomingX1, config.HomingZ1, config.HomingX2, config.HomingZ2
+                )
+            
+            if config.FiveAxisMachine:
+                initPosCommand += " " + self.generateRotationPosition(config, config.HomingR1)
+
+            # - Initialize position
+            GCODE += self.templates["InitPositionCommand"].fill(Position=initPosCommand) + "\n"
+
+        if config.EnableParking:
+            # - Park
+            GCODE += self.makeCommentedLine(config, "- Parking -") + "\n"
+            GCODE += self.generateRapidTravel(config, config.ParkX, config.ParkZ, config.ParkX, config.ParkZ )
+            if config.FiveAxisMachine:
+                GCODE += self.generateRotation(config, self.templates["MoveCommand"], config.ParkR1, config.FeedRateRotate)
+
+        # - Go to start point on parking Z if parking enabled
+        if start_point is not None:
+            start_L, start_R = start_point
+            if config.EnableParking:
+                GCODE += self.generateRapidTravel(config, start_L.y, config.ParkZ, start_R.y, config.ParkZ)
+
+        wirePower = config.WireMinPower
+        # - generate compensated wire power
+        if config.DynamicWirePower and start_point is not None:
+            # - Calculate wire length
+            wire_length = start_L.distanceToPoint(start_R)
+            wirePower = self.generateWireCompensatedPower(config, wire_length, float(config.WireMinPower))
+
+        # - Enable wire
+        GCODE += self.generateWireEnable(config, wirePower)
+
+        return GCODE
+
+    def generateEndBlock(self, config):
+        GCODE = "\n"
+        GCODE += self.makeCommentedLine(config, "*** END BLOCK ***") + "\n"
+
+        # - Disable wire
+        GCODE += self.generateWireDisable(config)
+
+        # - Up wire at current position to park height
+        if config.EnableParking:
+            GCODE += self.makeCommentedLine(config, "- Parking -") + "\n"
+            up_posistion  = "%s%.2f %s%.2f" % (config.Z1AxisName, config.ParkZ, config.Z2AxisName, config.ParkZ)
+            feed_rate     = config.FeedRateMove
+            GCODE += self.templates["MoveCommand"].fill(Position=up_posistion, FeedRate=str(float(feed_rate) * 60)) + "\n"
+
+        # - Park XZ
+        if config.EnableParking:
+            GCODE += self.generateRapidTravel(config, config.ParkX, config.ParkZ, config.ParkX, config.ParkZ )
+            # - Park R1
+            if config.FiveAxisMachine:
+                GCODE += self.generateRotation(config, self.templates["MoveCommand"], config.ParkR1, config.FeedRateRotate)
+        
+        if config.EndProgramCode:
+            GCODE += "{}\n".format(config.EndProgramCode)
+            
+        return GCODE
+
+    '''
+    Make GCODE from rotation element
+    '''
+    def makeGCODEFromRotation(self, rt, config):
+        GCODE = "\n"
+        GCODE += self.makeCommentedLine(config, "- Rotation [{}] -".format(rt.Label)) + "\n"
+
+        # - Generate rotation command
+        GCODE += self.generateRotation(config, self.templates["MoveCommand"], rt.Angle, config.FeedRateRotate)
+        return GCODE
+
+    '''
+    Calculate compensated wire power for array of wire lengths
+    '''
+    def generateWireCompensatedPowers(self, config, wire_lengths, min_power):
+        max_power   = float(config.WireMaxPower)
+        min_length  = float(config.FieldWidth)
+
+        # - Calculate and clip power
+        return np.minimum((min_power * wire_lengths) / min_length, max_power)
+
+    '''
+    Make line format for travel command, so run of points could be formatted in one pass.
+    Position axes, wire power (if power is not None) and feed rate (if feed_format is not None) are left as %-placeholders.
+    '''
+    def makeTravelFormat(self, config, template, feed_rate, power, feed_format = None):
+        position = "%s%%.2f %s%%.2f %s%%.2f %s%%.2f" % tuple(
+            str(name).replace("%", "%%") for name in (config.X1AxisName, config.Z1AxisName, config.X2AxisName, config.Z2AxisName))
+
+        return template.makeFormat(
+            Position=position, 
+            FeedRate=feed_format if feed_format is not None else "%.2f" %  (float(feed_rate) * 60), 
+            WirePower="S%.2f" if power is not None else "") + "\n"
+
+    '''
+    Generate travel commands for run of points in one vectorized pass
+    @param points_l - (N, 3) array of left points
+    @param points_r - (N, 3) array of right points
+    @param power - wire power to compensate by wire length, or None to skip power command
+    @param feeds - (N) array of feed words, or None to use feed_rate for all moves
+    @param feed_format - format of feed words
+    Yields chunks of GCODE lines
+    '''
+    def generateTravelBatch(self, config, template, feed_rate, points_l, points_r, power = None, feeds = None, feed_format = "%.2f"):
+        if len(points_l) == 0:
+            return
+
+        origin = float(config.OriginX)
+
+        columns = {
+            "Position": [points_l[:, 1] - origin, points_l[:, 2], points_r[:, 1] - origin, points_r[:, 2]]
+        }
+        if power is not None:
+            columns["WirePower"] = [self.generateWireCompensatedPowers(config, np.linalg.norm(points_l - points_r, axis=1), power)]
+        if feeds is not None:
+            columns["FeedRate"] = [feeds]
+        
+        # - keep columns in the same order as slots in the command
+        data = np.column_stack([column for slot in template.Slots for column in columns.get(slot, [])])
+        line = self.makeTravelFormat(config, template, feed_rate, power, feed_format if feeds is not None else None)
+
+        for start in range(0, len(data), GCODE_CHUNK_LINES):
+            chunk = data[start:start + GCODE_CHUNK_LINES]
+            yield (line * len(chunk)) % tuple(chunk.ravel().tolist())
+    
+    '''
+    Generate arc travel. Both sides are moved along arcs synchronously
+    @param feed - feed word
+    @param start_l, end_l, center_l - start, end and center of the left arc in machine coordinates
+    @param start_r, end_r, center_r - start, end and center of the right arc in machine coordinates
+    '''
+    def generateArcTravel(self, config, ccw, feed, wire_power, start_l, end_l, center_l, start_r, end_r, center_r):
+        template = self.templates["ArcCCWCommand" if ccw else "ArcCWCommand"]
+        origin = float(config.OriginX)
+
+        # - Controller starts arc from rounded position
+        offset_l = getArcCenterOffset(np.round(start_l, 2), np.round(end_l, 2), center_l)
+        offset_r = getArcCenterOffset(np.round(start_r, 2), np.round(end_r, 2), center_r)
+
+        return template.fill(
+            Position=self.generateTravelPosition(config, end_l[0] + origin, end_l[1], end_r[0] + origin, end_r[1]),
+            I1="%.3f" % offset_l[0], J1="%.3f" % offset_l[1], 
+            I2="%.3f" % offset_r[0], J2="%.3f" % offset_r[1],
+            FeedRate=feed,
+            WirePower="S%.2f" % wire_power if wire_power is not None else "") + "\n"
+
+    '''
+    Calculate inverse time feed words for run of points.
+    Duration of each move is defined by the longer side, so both sides finish the move together
+    @param feed_rate - feed rate of the longer side
+    @param points_l - (N, 3) array of left points
+    @param points_r - (N, 3) array of right points
+    @param previous_l, previous_r - points before the run
+    @param planned - (N) array of planned feed rates of moves of all axes, or None to use feed_rate for the longer side
+    @returns (N) array of moves per minute
+    '''
+    def generateInverseTimeFeeds(self, feed_rate, points_l, points_r, previous_l, previous_r, planned = None):
+        lengths_l = np.linalg.norm(np.diff(np.vstack((previous_l, points_l)), axis=0), axis=1)
+        lengths_r = np.linalg.norm(np.diff(np.vstack((previous_r, points_r)), axis=0), axis=1)
+
+        if planned is not None:
+            return (planned * 60) / np.maximum(np.hypot(lengths_l, lengths_r), INVERSE_TIME_MIN_LENGTH)
+        
+        return (float(feed_rate) * 60) / np.maximum(np.maximum(lengths_l, lengths_r), INVERSE_TIME_MIN_LENGTH)
+
+    '''
+    Generate cut travel commands for run of points.
+    If arc fitting enabled, runs of points which lay on arcs on both sides are replaced by arc commands.
+    In inverse time feed mode moves of the run are wrapped into G93/G94 and each move gets own feed word.
+    @param points_l - (N, 3) array of left points
+    @param points_r - (N, 3) array of right points
+    @param power - wire power to compensate by wire length, or None to skip power command
+    @param previous_l, previous_r - points before the run, needed for inverse time feeds
+    @param planned - (N) array of planned feed rates of moves to each point, or None to use feed_rate for all moves
+    Yields chunks of GCODE lines
+    '''
+    def generateCutBatch(self, config, feed_rate, points_l, points_r, power = None, previous_l = None, previous_r = None, planned = None):
+        template = self.templates["CutCommand"]
+
+        if len(points_l) == 0:
+            return
+
+        inverse_time = hasattr(config, "FeedMode") and config.FeedMode == utilities.FC_FEED_MODES[1] #["Units per minute", "Inverse time"]
+
+        feeds = None
+        feed_format = INVERSE_TIME_FORMAT
+        if inverse_time:
+            feeds = self.generateInverseTimeFeeds(feed_rate, points_l, points_r, 
+                                                  points_l[0] if previous_l is None else previous_l, 
+                                                  points_r[0] if previous_r is None else previous_r, planned)
+        elif planned is not None:
+            feeds = planned * 60
+            feed_format = "%.2f"
+
+        moves = self.generateCutMoves(config, template, feed_rate, points_l, points_r, power, feeds, feed_format, inverse_time)
+        if not inverse_time:
+            yield from moves
+            return
+
+        # - mode is switched only around runs which have moves
+        started = False
+        for chunk in moves:
+            if len(chunk) == 0:
+                continue
+            if not started:
+                yield "G93\n"
+                started = True
+            yield chunk
+
+        if started:
+            yield "G94\n"
+
+    '''
+    Generate cut moves of the run: lines and, if arc fitting enabled, arcs
+    @param template - cut command template
+    @param feeds - (N) array of feed words of moves to each point, or None to use feed_rate for all moves
+    @param feed_format - format of feed words
+    @param inverse_time - True if feeds are inverse time feed words
+    Yields chunks of GCODE lines
+    '''
+    def generateCutMoves(self, config, template, feed_rate, points_l, points_r, power, feeds, feed_format, inverse_time):
+        if not (hasattr(config, "ArcFitting") and config.ArcFitting):
+            yield from self.generateTravelBatch(config, template, feed_rate, points_l, points_r, power, feeds, feed_format)
+        else:
+            origin = float(config.OriginX)
+            plane_l = np.column_stack((points_l[:, 1] - origin, points_l[:, 2]))
+            plane_r = np.column_stack((points_r[:, 1] - origin, points_r[:, 2]))
+
+            linear_start = 0
+            for start, end, center_l, center_r, ccw in findArcs(plane_l, plane_r, float(config.ArcTolerance)):
+                # - Lines up to the arc start
+                yield from self.generateTravelBatch(config, template, feed_rate, points_l[linear_start:start + 1], points_r[linear_start:start + 1], power,
+                                                    feeds[linear_start:start + 1] if feeds is not None else None, feed_format)
+
+                wire_power = None
+                if power is not None:
+                    wire_power = self.generateWireCompensatedPowers(config, np.linalg.norm(points_l[end] - points_r[end]), power)
+
+                if inverse_time:
+                    # - arc takes as long as moves it replaces
+                    feed = INVERSE_TIME_FORMAT % (1.0 / np.sum(1.0 / feeds[start + 1:end + 1]))
+                elif feeds is not None:
+                    # - arc doesn't exceed planned feed rates of moves it replaces
+                    feed = feed_format % feeds[start + 1:end + 1].min()
+                else:
+                    feed = "%.2f" %  (float(feed_rate) * 60)
+
+                yield self.generateArcTravel(config, ccw, feed, wire_power, 
+                                             plane_l[start], plane_l[end], center_l, plane_r[start], plane_r[end], center_r)
+                linear_start = end + 1
+
+            yield from self.generateTravelBatch(config, template, feed_rate, points_l[linear_start:], points_r[linear_start:], power, 
+                                                feeds[linear_start:] if feeds is not None else None, feed_format)
+
+    '''
+    Generate GCODE from route.
+    Yields program chunks: start block, route chunks and end block.
+    '''
+    def generateGCODE(self, route_list, config):
+        self.compileTemplates(config)
+
+        self.program_stats = GcodeStats("Program")
+        self.routes_stats = []
+
+        start_point = None
+
+        # find first point for start block
+        for route in route_list:
+            if len(route.Offset_L) > 0 and len(route.Offset_R) > 0:
+                start_point = (route.Offset_L[0], route.Offset_R[0])
+                break
+
+        # ---- Generate startup block
+        yield from self.countLines(self.program_stats, self.optimizeSection(config, [self.generateStartBlock(config, start_point)]))
+
+        yield from self.countLines(self.program_stats, ["\n" + self.makeCommentedLine(config, "*** TASK BLOCK ***") + "\n"])
+
+        # - Precompute rotation axis and machine position at the start of each route
+        position = self.getStartBlockPosition(config, start_point)
+        snapshots = []
+        for route in route_list:
+            snapshot = GcodeRouteSnapshot(route, config)
+            snapshot.RotationPosition = self.rotation_position
+            snapshot.StartPosition = position
+            self.rotation_position += sum(item.Angle for item in snapshot.Items if item.Type == "Rotation")
+            if len(snapshot.Offset_L) > 0 and len(snapshot.Offset_R) > 0:
+                position = (snapshot.Offset_L[-1], snapshot.Offset_R[-1])
+            snapshots.append(snapshot)
+
+        # - Walk all routes
+        yield from self.generateRoutes(GcodeConfig(config), snapshots)
+
+        #generate end block        
+        yield from self.countLines(self.program_stats, self.optimizeSection(config, [self.generateEndBlock(config)]))
+
+        for stats in self.routes_stats:
+            self.program_stats.add(stats)
+
+    '''
+    Get machine position after the start block
+    @param start_point - pair of App.Vector - first points of the program, or None
+    @returns pair of (3,) arrays of left and right points, or None if position is unknown
+    '''
+    def getStartBlockPosition(self, config, start_point):
+        if config.EnableParking:
+            if start_point is not None:
+                start_L, start_R = start_point
+                return (np.array((0.0, start_L.y, float(config.ParkZ))), np.array((0.0, start_R.y, float(config.ParkZ))))
+            return (np.array((0.0, float(config.ParkX), float(config.ParkZ))), np.array((0.0, float(config.ParkX), float(config.ParkZ))))
+
+        if config.EnableHoming:
+            return (np.array((0.0, float(config.HomingX1), float(config.HomingZ1))), np.array((0.0, float(config.HomingX2), float(config.HomingZ2))))
+
+        return None
+
+    '''
+    Generate GCODE of the routes. 
+    Routes are generated in worker processes if possible and merged in the same order.
+    '''
+    def generateRoutes(self, config, snapshots):
+        global GCODE_WORKER_STATE
+
+        pointsCount = sum(len(snapshot.Offset_L) for snapshot in snapshots)
+        workers = utilities.getWorkersCount(len(snapshots)) if pointsCount >= PARALLEL_GCODE_MIN_POINTS else 1
+
+        if workers <= 1:
+            for snapshot in snapshots:
+                yield from self.generateRoute(config, snapshot)
+                self.routes_stats.append(self.stats)
+            return
+
+        # - workers are forked, so they get generator state without pickling
+        GCODE_WORKER_STATE = (self, snapshots, config)
+        try:
+            with multiprocessing.get_context("fork").Pool(workers) as pool:
+                for gcode, stats in pool.imap(generateRouteInWorker, range(len(snapshots))):
+                    self.routes_stats.append(stats)
+                    yield gcode
+        finally:
+            GCODE_WORKER_STATE = None
+
+    '''
+    Generate GCODE of the single route, from "Route begin" to "Route end"
+    @param snapshot - GcodeRouteSnapshot
+    '''
+    def generateRoute(self, config, snapshot):
+        self.stats = GcodeStats(snapshot.Label)
+        yield from self.countLines(self.stats, self.optimizeSection(config, self.generateRouteBody(config, snapshot)))
+
+    '''
+    Count lines of GCODE chunks
+    '''
+    def countLines(self, stats, chunks):
+        for chunk in chunks:
+            stats.Lines += chunk.count("\n")
+            yield chunk
+
+    '''
+    Add length and duration of the moves to the route statistics
+    @param rapid - moves are rapid
+    @param feed_rate - feed rate of the moves
+    @param points_l - (N, 3) array of left points, first point is the start of the first move
+    @param points_r - (N, 3) array of right points, first point is the start of the first move
+    @param planned - (N - 1) array of planned feed rates of cut moves, or None
+    '''
+    def collectTravelStats(self, config, rapid, feed_rate, points_l, points_r, planned = None):
+        lengths_l = np.linalg.norm(np.diff(points_l, axis=0), axis=1)
+        lengths_r = np.linalg.norm(np.diff(points_r, axis=0), axis=1)
+
+        if rapid:
+            self.stats.RapidLengthLeft += float(lengths_l.sum())
+            self.stats.RapidLengthRight += float(lengths_r.sum())
+            # - controller applies feed rate to the move of all axes
+            self.stats.RapidTime += float(np.hypot(lengths_l, lengths_r).sum()) / float(feed_rate)
+            return
+
+        self.stats.CutLengthLeft += float(lengths_l.sum())
+        self.stats.CutLengthRight += float(lengths_r.sum())
+
+        inverse_time = hasattr(config, "FeedMode") and config.FeedMode == utilities.FC_FEED_MODES[1] #["Units per minute", "Inverse time"]
+
+        if planned is not None:
+            lengths = np.hypot(lengths_l, lengths_r)
+            if inverse_time:
+                lengths = np.maximum(lengths, INVERSE_TIME_MIN_LENGTH)
+            self.stats.CutTime += float((lengths / planned).sum())
+        elif inverse_time:
+            self.stats.CutTime += float(np.maximum(np.maximum(lengths_l, lengths_r), INVERSE_TIME_MIN_LENGTH).sum()) / float(feed_rate)
+        else:
+            self.stats.CutTime += float(np.hypot(lengths_l, lengths_r).sum()) / float(feed_rate)
+
+    '''
+    Generate GCODE of the single route without optimization
+    @param snapshot - GcodeRouteSnapshot
+    '''
+    def generateRouteBody(self, config, snapshot):
+        self.rotation_position = snapshot.RotationPosition
+
+        # - Task GCODE buffer
+        TASK = ["\n", self.makeCommentedLine(config, "--- Route begin [{}] ---".format(snapshot.Label)) + "\n"]
+
+        point_index = 0
+
+        offset_l = snapshot.Offset_L
+        offset_r = snapshot.Offset_R
+
+        if len(offset_l) > 0 or len(offset_r) > 0:                
+            # - Generate rapid travel command
+            TASK.append(self.generateRapidTravel(config, offset_l[0][1], offset_l[0][2], offset_r[0][1], offset_r[0][2]))
+            if snapshot.StartPosition is not None:
+                # - only machine axes move, so points are compared in working planes
+                start_l, start_r = snapshot.StartPosition
+                self.collectTravelStats(config, True, config.FeedRateMove, 
+                                        np.vstack((start_l[1:], offset_l[0][1:])), np.vstack((start_r[1:], offset_r[0][1:])))
+
+            self.stats.MaxWireStretch = float(np.linalg.norm(offset_l - offset_r, axis=1).max()) - float(config.FieldWidth)
+        
+        for item in snapshot.Items:
+            if item.Type == "Rotation": # - Make GCODE from rotation
+                TASK.append(self.makeGCODEFromRotation(item, config))
+                self.stats.RapidTime += abs(item.Angle) / float(config.FeedRateRotate)
+                continue
+
+            TASK.append("\n")
+            TASK.append(self.makeCommentedLine(config, "- {} [{}]".format(item.Type, item.Label)) + "\n")
+
+            points_count = item.PointsCount
+
+            rapid = np.full(points_count, item.RapidMove)
+
+            # for enter and exit allow rapid move only for the last segment
+            # lead-in and lead-out should be normal move to keep wire powered and prevent breakage
+            if item.LeadOutEnabled:
+                rapid[:-1] = False
+
+            if item.LeadInEnabled:
+                rapid[2:] = False
+
+            # - Flush buffer before the points
+            yield "".join(TASK)
+            TASK = []
+
+            # - Step over each run of rapid or cut moves
+            runs = np.flatnonzero(np.diff(rapid)) + 1
+            for run_start, run_end in zip([0] + runs.tolist(), runs.tolist() + [points_count]):
+                points_l = offset_l[point_index + run_start:point_index + run_end]
+                points_r = offset_r[point_index + run_start:point_index + run_end]
+                previous = max(point_index + run_start - 1, 0)
+
+                if rapid[run_start]:
+                    # - Generate rapid travel commands
+                    yield from self.generateTravelBatch(config, self.templates["MoveCommand"], config.FeedRateMove, points_l, points_r)
+                    self.collectTravelStats(config, True, config.FeedRateMove, 
+                                            offset_l[previous:point_index + run_end], offset_r[previous:point_index + run_end])
+                else:
+                    feeds = snapshot.Feeds
+                    # - Generate CUT travel commands
+                    yield from self.generateCutBatch(config, item.Feed, points_l, points_r, 
+                                                     item.Power if config.DynamicWirePower else None,
+                                                     offset_l[previous], offset_r[previous],
+                                                     feeds[point_index + run_start:point_index + run_end] if feeds is not None else None)
+                    self.collectTravelStats(config, False, item.Feed, 
+                                            offset_l[previous:point_index + run_end], offset_r[previous:point_index + run_end],
+                                            feeds[previous + 1:point_index + run_end] if feeds is not None else None)
+
+            # - Increase point index
+            point_index += points_count
+            
+            if item.PauseDuration > 0:
+                self.stats.PauseTime += item.PauseDuration
+
+                duration = item.PauseDuration
+                if config.TimeUnits == utilities.FC_TIME_UNITS[1]: #["Seconds", "Milliseconds"]
+                    duration = duration * 1000
+                TASK.append(self.generatePause(self.templates["PauseCommand"], duration))
+        
+        TASK.append(self.makeCommentedLine(config, "--- Route end [{}] ---".format(snapshot.Label)) + "\n")
+        TASK.append("\n")
+
+        # - Flush route
+        yield "".join(TASK)
+
+    '''
+    Optimize section of the program if optimization enabled. 
+    Each section starts with unknown machine state, so sections could be generated independently.
+    '''
+    def optimizeSection(self, config, chunks):
+        if hasattr(config, "OptimizeOutput") and config.OptimizeOutput:
+            yield from self.optimizeGCODE(config, chunks)
+        else:
+            yield from chunks
+
+    '''
+    Drop words which don't change modal state of the machine and moves of zero length
+    '''
+    def optimizeGCODE(self, config, chunks):
+        optimizer = GcodeOptimizer(config)
+        tail = ""
+
+        for chunk in chunks:
+            lines = (tail + chunk).split("\n")
+            # - last line might be continued in the next chunk
+            tail = lines.pop()
+
+            result = [line for line in map(optimizer.optimizeLine, lines) if line is not None]
+            if len(result) > 0:
+                yield "\n".join(result) + "\n"
+
+        if len(tail) > 0:
+            line = optimizer.optimizeLine(tail)
+            if line is not None:
+                yield line
+
+    '''
+    Get report of the last generated program
+    '''
+    def getReport(self):
+        return {
+            "Program": self.program_stats.toDict(),
+            "Routes": [stats.toDict() for stats in self.routes_stats]
+        }
+
+    '''
+    Write report of the last generated program as JSON sidecar next to the GCODE file
+    @returns path of the report file
+    '''
+    def writeReport(self, save_path):
+        report_path = os.path.splitext(save_path)[0] + ".json"
+
+        with open(report_path, "w") as f:
+            json.dump(self.getReport(), f, indent=4)
+
+        return report_path
+
+    '''
+    Write GCODE chunks into the file as they are generated
+    '''
+    def writeGCODE(self, save_path, chunks):
+        # - get first chunk before opening the file, so configuration errors will not leave empty file
+        chunks = iter(chunks)
+        first = next(chunks, "")
+
+        with open(save_path, "w", buffering=GCODE_WRITE_BUFFER) as f:
+            f.write(first)
+            for chunk in chunks:
+                f.write(chunk)
+
+def getRoutesConfig(routes):
+    '''
+    Get machine configuration for the routes
+    @param routes - list of Route objects. All routes should belong to the same Job
+    @returns Config object
+    '''
+    job_name = routes[0].JobName
+
+    for route in routes:
+        if route.JobName != job_name:
+            raise Exception("ERROR: All routes should belong to the same Job.")
+
+    job = routes[0].Document.getObject(job_name)
+    if job is None or job.Type != "Job":
+        raise Exception("ERROR: Job [{}] not found in document.".format(job_name))
+
+    return utilities.getConfigByName(job.ConfigName, routes[0].Document)
+
+def generate_gcode(routes, config, out_path):
+    '''
+    Generate Gcode from routes and save it into the file. 
+    Report of the program is saved next to the file with .json extension.
+    Doesn't need GUI, so could be used in FreeCADCmd.
+
+    @param routes - Route object or list of Route objects. Routes will be placed in the program in the same order
+    @param config - Config object. If None, config of the routes Job will be used
+    @param out_path - path of the output file
+    @returns path of the output file
+    '''
+    if not isinstance(routes, (list, tuple)):
+        routes = [routes]
+
+    if len(routes) == 0:
+        raise Exception("ERROR: No routes to generate Gcode from.")
+
+    # - Check routes type
+    for route in routes:
+        if not hasattr(route, "Type") or (route.Type != "Route"):
+            raise Exception("ERROR: Object type not supported. [{}] is not a Route.".format(route.Label))
+
+    if config is None:
+        config = getRoutesConfig(routes)
+        if config is None:
+            raise Exception("ERROR: Config not found.")
+
+    generator = GcodeGenerator()
+    generator.writeGCODE(out_path, generator.generateGCODE(routes, config))
+    generator.writeReport(out_path)
+
+    return out_path
@@ -14,6 +14,7 @@ import utilities
 
 
 class MachineConfig(FoamCutBase.FoamCutBaseObject):
+    @utilities.batchParameters
     def __init__(self, obj, jobName):
         super().__init__(obj, jobName)     
         obj.Type = "Helper"  
@@ -46,6 +47,11 @@ class MachineConfig(FoamCutBase.FoamCutBaseObject):
         obj.addProperty("App::PropertySpeed",      "FeedRateCut",       "FeedRate",         "Feed rate while cutting").FeedRateCut = utilities.getParameterFloat("FeedRateCut", 7)
         obj.addProperty("App::PropertySpeed",      "FeedRateMove",      "FeedRate",         "Feed rate while moving").FeedRateMove = utilities.getParameterFloat("FeedRateMove", 30)
         obj.addProperty("App::PropertySpeed",      "FeedRateRotate",    "FeedRate",         "Feed rate while rotating").FeedRateRotate = utilities.getParameterFloat("FeedRateRotate", 30)
+        obj.addProperty("App::PropertyEnumeration","FeedMode",          "FeedRate",         "Feed rate mode for cutting moves. \r\n\
+Units per minute - G94, feed rate of the longer side is kept by the controller. \r\n\
+Inverse time - G93, each move gets duration computed from the longer side, so both towers finish the move together.").FeedMode = utilities.FC_FEED_MODES
+        obj.FeedMode = utilities.FC_FEED_MODES.index(utilities.getParameterString("FeedMode", "Units per minute"))
+        self.addAxesSpeedLimits(obj)
 
         obj.addProperty("App::PropertyInteger",    "WireMinPower",      "Wire",             "Minimum wire power").WireMinPower = utilities.getParameterInt("WireMinPower", 700)
         obj.addProperty("App::PropertyInteger",    "WireMaxPower",      "Wire",             "Maximum wire power").WireMaxPower = utilities.getParameterInt("WireMaxPower", 1000)
@@ -66,6 +72,10 @@ But in some foams it will not be that simple, since wire melts foam and it becam
 Normally it should be 1.0, but for denser foam it could be bigger.").CompensationDegree = utilities.getParameterFloat("CompensationDegree", 1.0)
         
         obj.addProperty("App::PropertyLength",     "DiscretizationStep",   "GCODE",         "Discretization step").DiscretizationStep = 0.5
+        obj.addProperty("App::PropertyLength",     "ChordTolerance",       "GCODE",         "Max distance between source edge and path segment. " + 
+"Set value greater than 0mm to place points adaptively to edges curvature instead of fixed discretization step").ChordTolerance = utilities.getParameterFloat("ChordTolerance", 0.0)
+        obj.addProperty("App::PropertyLength",     "MinDiscretizationStep", "GCODE",        "Min distance between points of adaptive discretization").MinDiscretizationStep = utilities.getParameterFloat("MinDiscretizationStep", 0.05)
+        obj.addProperty("App::PropertyLength",     "MaxDiscretizationStep", "GCODE",        "Max distance between points of adaptive discretization").MaxDiscretizationStep = utilities.getParameterFloat("MaxDiscretizationStep", 5.0)
         obj.addProperty("App::PropertyString",     "CutCommand",           "GCODE",         "Command for move while cutting").CutCommand = utilities.getParameterString("CutCommand", "G01 {Position} F{FeedRate} {WirePower}")
         obj.addProperty("App::PropertyString",     "MoveCommand",          "GCODE",         "Command for move with cold wire").MoveCommand = utilities.getParameterString("MoveCommand", "G00 {Position} F{FeedRate}")
         obj.addProperty("App::PropertyString",     "PauseCommand",         "GCODE",         "Command for pause movements").PauseCommand = utilities.getParameterString("PauseCommand", "G04 P{Duration}")
@@ -83,6 +93,15 @@ Could be inline comments started with ; or multiline inside () or ignored alltog
         obj.addProperty("App::PropertyEnumeration","TimeUnits",            "GCODE",         "Units for time in Gcode. " + 
 "GRBL and LinuxCNC usually use seconds, other controllers may use milliseconds").TimeUnits = utilities.FC_TIME_UNITS
         obj.TimeUnits = utilities.FC_TIME_UNITS.index(utilities.getParameterString("TimeUnits", "Seconds"))
+        obj.addProperty("App::PropertyBool",       "OptimizeOutput",       "GCODE",         "Optimize Gcode output. " + 
+"Words which don't change modal state (motion mode, feed rate, wire power, coordinates) and moves of zero length will be dropped").OptimizeOutput = utilities.getParameterBool("OptimizeOutput", False)
+        obj.addProperty("App::PropertyBool",       "ArcFitting",           "GCODE",         "Replace runs of points lying on arcs on both sides by arc commands. " + 
+"Controller should support synchronized arcs in both planes").ArcFitting = utilities.getParameterBool("ArcFitting", False)
+        obj.addProperty("App::PropertyLength",     "ArcTolerance",         "GCODE",         "Max distance of the points from the fitted arc").ArcTolerance = utilities.getParameterFloat("ArcTolerance", 0.02)
+        obj.addProperty("App::PropertyString",     "ArcCWCommand",         "GCODE",         "Command for clockwise arc while cutting. " + 
+"{I1} {J1} and {I2} {J2} are arc center offsets from the start point for left and right plane").ArcCWCommand = utilities.getParameterString("ArcCWCommand", "G02 {Position} I{I1} J{J1} K{I2} L{J2} F{FeedRate} {WirePower}")
+        obj.addProperty("App::PropertyString",     "ArcCCWCommand",        "GCODE",         "Command for counterclockwise arc while cutting. " + 
+"{I1} {J1} and {I2} {J2} are arc center offsets from the start point for left and right plane").ArcCCWCommand = utilities.getParameterString("ArcCCWCommand", "G03 {Position} I{I1} J{J1} K{I2} L{J2} F{FeedRate} {WirePower}")
         
         obj.addProperty("App::PropertyDistance",   "SafeHeight",           "Travel",        "Safe height for travel").SafeHeight = utilities.getParameterFloat("SafeHeight", 200)        
         obj.addProperty("App::PropertyTime",       "PauseDuration",        "Travel",        "Pause duration seconds").PauseDuration = utilities.getParameterFloat("PauseDuration", 1.0)
@@ -104,11 +123,15 @@ Could be inline comments started with ; or multiline inside () or ignored alltog
         obj.setEditorMode("ParkR1", 0 if obj.EnableParking and obj.FiveAxisMachine else 3)
         obj.setEditorMode("OriginRotationX", 0 if obj.FiveAxisMachine else 3)
         obj.setEditorMode("R1AxisName", 0 if obj.FiveAxisMachine else 3)
+        obj.setEditorMode("ArcTolerance", 0 if obj.ArcFitting else 3)
+        obj.setEditorMode("ArcCWCommand", 0 if obj.ArcFitting else 3)
+        obj.setEditorMode("ArcCCWCommand", 0 if obj.ArcFitting else 3)
 
         obj.setEditorMode("Group",     3)
         obj.Proxy = self
         self.execute(obj)
 
+    @utilities.batchParameters
     def onDocumentRestored(self, obj):
         # Migrating from 0.1.2 to 0.1.3 - this properties needed for dynamic kerf compensation
         if not hasattr(obj, "CompensationDegree"):
@@ -159,6 +182,52 @@ For example LinuxCNC expect to see % character as the last command.").EndProgram
             obj.addProperty("App::PropertyEnumeration","CommentStyle",          "GCODE",         "Style of commented lines. \r\n\
 Could be inline comments started with ; or multiline inside () or ignored alltogether.").CommentStyle = utilities.FC_COMMENT_STYLES
             obj.CommentStyle = utilities.FC_COMMENT_STYLES.index(utilities.getParameterString("CommentStyle", "; Comment"))
+
+        if not hasattr(obj, "OptimizeOutput"):
+            print("{} - Migrating from 0.1.12 to 0.1.13 - add OptimizeOutput property.".format(obj.Label))
+            obj.addProperty("App::PropertyBool",       "OptimizeOutput",       "GCODE",         "Optimize Gcode output. " + 
+"Words which don't change modal state (motion mode, feed rate, wire power, coordinates) and moves of zero length will be dropped").OptimizeOutput = utilities.getParameterBool("OptimizeOutput", False)
+
+        if not hasattr(obj, "ArcFitting"):
+            print("{} - Migrating from 0.1.12 to 0.1.13 - add ArcFitting properties.".format(obj.Label))
+            obj.addProperty("App::PropertyBool",       "ArcFitting",           "GCODE",         "Replace runs of points lying on arcs on both sides by arc commands. " + 
+"Controller should support synchronized arcs in both planes").ArcFitting = utilities.getParameterBool("ArcFitting", False)
+            obj.addProperty("App::PropertyLength",     "ArcTolerance",         "GCODE",         "Max distance of the points from the fitted arc").ArcTolerance = utilities.getParameterFloat("ArcTolerance", 0.02)
+            obj.addProperty("App::PropertyString",     "ArcCWCommand",         "GCODE",         "Command for clockwise arc while cutting. " + 
+"{I1} {J1} and {I2} {J2} are arc center offsets from the start point for left and right plane").ArcCWCommand = utilities.getParameterString("ArcCWCommand", "G02 {Position} I{I1} J{J1} K{I2} L{J2} F{FeedRate} {WirePower}")
+            obj.addProperty("App::PropertyString",     "ArcCCWCommand",        "GCODE",         "Command for counterclockwise arc while cutting. " + 
+"{I1} {J1} and {I2} {J2} are arc center offsets from the start point for left and right plane").ArcCCWCommand = utilities.getParameterString("ArcCCWCommand", "G03 {Position} I{I1} J{J1} K{I2} L{J2} F{FeedRate} {WirePower}")
+            obj.setEditorMode("ArcTolerance", 0 if obj.ArcFitting else 3)
+            obj.setEditorMode("ArcCWCommand", 0 if obj.ArcFitting else 3)
+            obj.setEditorMode("ArcCCWCommand", 0 if obj.ArcFitting else 3)
+
+        if not hasattr(obj, "FeedMode"):
+            print("{} - Migrating from 0.1.12 to 0.1.13 - add FeedMode property.".format(obj.Label))
+            obj.addProperty("App::PropertyEnumeration","FeedMode",          "FeedRate",         "Feed rate mode for cutting moves. \r\n\
+Units per minute - G94, feed rate of the longer side is kept by the controller. \r\n\
+Inverse time - G93, each move gets duration computed from the longer side, so both towers finish the move together.").FeedMode = utilities.FC_FEED_MODES
+            obj.FeedMode = utilities.FC_FEED_MODES.index(utilities.getParameterString("FeedMode", "Units per minute"))
+
+        if not hasattr(obj, "ChordTolerance"):
+            print("{} - Migrating from 0.1.12 to 0.1.13 - add adaptive discretization properties.".format(obj.Label))
+            obj.addProperty("App::PropertyLength",     "ChordTolerance",       "GCODE",         "Max distance between source edge and path segment. " + 
+"Set value greater than 0mm to place points adaptively to edges curvature instead of fixed discretization step").ChordTolerance = utilities.getParameterFloat("ChordTolerance", 0.0)
+            obj.addProperty("App::PropertyLength",     "MinDiscretizationStep", "GCODE",        "Min distance between points of adaptive discretization").MinDiscretizationStep = utilities.getParameterFloat("MinDiscretizationStep", 0.05)
+            obj.addProperty("App::PropertyLength",     "MaxDiscretizationStep", "GCODE",        "Max distance between points of adaptive discretization").MaxDiscretizationStep = utilities.getParameterFloat("MaxDiscretizationStep", 5.0)
+
+        if not hasattr(obj, "X1MaxFeedRate"):
+            print("{} - Migrating from 0.1.12 to 0.1.13 - add axes speed limits properties.".format(obj.Label))
+            self.addAxesSpeedLimits(obj)
+
+    def addAxesSpeedLimits(self, obj):
+        '''
+        Add speed limits of cutting axes, used by feed rate planning of routes
+        '''
+        for axis in ["X1", "Z1", "X2", "Z2"]:
+            name = axis + "MaxFeedRate"
+            obj.addProperty("App::PropertySpeed",  name,                "FeedRate",         "Max speed of {} axis while cutting, 0 - no limit".format(axis))
+            setattr(obj, name, utilities.getParameterFloat(name, 0.0))
+
     def execute(self, obj):
         
         pass 
@@ -197,6 +266,10 @@ Could be inline comments started with ; or multiline inside () or ignored alltog
             obj.setEditorMode("HomingR1", 0 if obj.EnableHoming and obj.FiveAxisMachine else 3) 
         if prop == "WireStretchVerification" and hasattr(obj, "WireStretchLength"):
             obj.setEditorMode("WireStretchLength", 0 if obj.WireStretchVerification else 3)          
+        if prop == "ArcFitting" and hasattr(obj, "ArcCCWCommand"):
+            obj.setEditorMode("ArcTolerance", 0 if obj.ArcFitting else 3)
+            obj.setEditorMode("ArcCWCommand", 0 if obj.ArcFitting else 3)
+            obj.setEditorMode("ArcCCWCommand", 0 if obj.ArcFitting else 3)
         pass
 
 class MachineConfigVP(FoamCutViewProviders.FoamCutBaseViewProvider):    
@@ -47,6 +47,20 @@ class MirrorG():
                     out_data.append("%s B%.2f F%.1f\n" % (CM, -RT if RT != 0 else 0, FR))
                     continue
 
+                # - Replace arc. Both planes keep their own coordinates, so only sides
+                #   are swapped and arc direction stays the same
+                if re.match('^(G0[23])', line):
+                    arc = re.search(r'^(G0[23]) X([\-]{0,1}[0-9]+\.[0-9]+) Y([\-]{0,1}[0-9]+\.[0-9]+) Z([\-]{0,1}[0-9]+\.[0-9]+) A([\-]{0,1}[0-9]+\.[0-9]+) I([\-]{0,1}[0-9]+\.[0-9]+) J([\-]{0,1}[0-9]+\.[0-9]+) K([\-]{0,1}[0-9]+\.[0-9]+) L([\-]{0,1}[0-9]+\.[0-9]+)(.*)$', line)
+                    if arc is None:
+                        App.Console.PrintError("ERROR: Unable to mirror arc [{}]. Disable ArcFitting in machine configuration and regenerate GCODE.\n".format(line))
+                        return
+
+                    CM = arc.group(1)
+                    LX, LY, RX, RY = arc.group(2), arc.group(3), arc.group(4), arc.group(5)
+                    LI, LJ, RI, RJ = arc.group(6), arc.group(7), arc.group(8), arc.group(9)
+                    out_data.append("%s X%s Y%s Z%s A%s I%s J%s K%s L%s%s\n" % (CM, RX, RY, LX, LY, RI, RJ, LI, LJ, arc.group(10)))
+                    continue
+
                 withPowerChange = True
                 mv = re.search(r'^(G0[01]) X([\-]{0,1}[0-9]+\.[0-9]+) Y([\-]{0,1}[0-9]+\.[0-9]+) Z([\-]{0,1}[0-9]+\.[0-9]+) A([\-]{0,1}[0-9]+\.[0-9]+) F([0-9]+\.[0-9]+) S([0-9]+\.[0-9]+)', line)
                 if mv is None:
@@ -12,329 +12,16 @@ import FreeCADGui
 Gui=FreeCADGui
 from PySide import QtGui
 import utilities
+import GcodeGenerator
 import os
 
-class Postprocess():
+class Postprocess(GcodeGenerator.GcodeGenerator):
     """Make Gcode"""
 
     '''
-    Makes commented line 
-    '''
-    def makeCommentedLine(self, config, inputString):
-        if config.CommentStyle == utilities.FC_COMMENT_STYLES[0]: # inline comments started with ;
-            return "; {}".format(inputString)
-        elif config.CommentStyle == utilities.FC_COMMENT_STYLES[1]: # inline or multiline comment inside ()
-            return "({})".format(inputString)
-        else:
-            return ""
-
-    '''
-    Generate position string for travel
-    '''
-    def generateTravelPosition(self, config, X1, Z1, X2, Z2):
-        return "%s%.2f %s%.2f %s%.2f %s%.2f" % (
-            config.X1AxisName, float(X1) - float(config.OriginX),
-            config.Z1AxisName, float(Z1),
-            config.X2AxisName, float(X2) - float(config.OriginX),
-            config.Z2AxisName, float(Z2)
-            )
-
-    '''
-    Generate rotation position
-    '''
-    def generateRotationPosition(self, config, angle):
-        self.rotation_position += float(angle)
-
-        return "%s%.2f" % (
-            config.R1AxisName, self.rotation_position
-        )
-
-    '''
-    Generate travel
-    '''
-    def generateTravel(self, config, command, feed_rate, wire_power, X1, Z1, X2, Z2):
-        # - Create position
-        position = self.generateTravelPosition(config, X1, Z1, X2, Z2)
-
-        # - Create GCODE
-        return command.replace("{Position}", str(position)).replace("{FeedRate}", "%.2f" %  (float(feed_rate) * 60)).replace("{WirePower}", str(wire_power)) + "\n"
-
-    '''
-    Generate rapid travel
-    '''
-    def generateRapidTravel(self, config, X1, Z1, X2, Z2):        
-        # - Create GCODE
-        return self.generateTravel(config, config.MoveCommand, config.FeedRateMove, '', X1, Z1, X2, Z2)
-
-    '''
-    Generate pause
-    '''
-    def generatePause(self, command, duration):
-        return command.replace("{Duration}", "%.2f" %  float(duration)) + "\n"
-
-    '''
-    Generate rotation
-    '''
-    def generateRotation(self, config, command, angle, feed_rate):
-        # - Create position
-        position = self.generateRotationPosition(config, angle)
-
-        # - Create GCODE
-        return command.replace("{Position}", str(position)).replace("{FeedRate}", "%.2f" %  (float(feed_rate) * 60)) + "\n"
-
-    '''
-    Generate wire enable command
-    '''
-    def generateWireEnable(self, config, power):
-        return config.WireOnCommand.replace("{WirePower}", "%.2f" % float(power)) + "\n"
-
-    '''
-    Generate wire disable command
-    '''
-    def generateWireDisable(self, config):
-        return config.WireOffCommand + "\n"
-
-    '''
-    Generate command for compensated power
-    '''
-    def generateWireCompensatedPower(self, config, wire_length, min_power):
-        max_power   = float(config.WireMaxPower)
-        min_length  = float(config.FieldWidth)
-
-        # - Calculate power
-        power = (min_power * wire_length) / min_length
-
-        # - Clip power
-        if power > max_power:
-            power = max_power
-
-        return power
-        
-    def generateStartBlock(self, config, start_point):
-        GCODE = ""
-        self.rotation_position = 0.0
-
-        if config.StartProgramCode:
-            GCODE += "{}\n".format(config.StartProgramCode)
-            GCODE += "\n"
-
-        GCODE += self.makeCommentedLine(config, "*** MACHINE ***") + "\n"
-        GCODE += self.makeCommentedLine(config, "Machine type: {}".format("5-Axis" if config.FiveAxisMachine else "4-Axis")) + "\n"
-        GCODE += self.makeCommentedLine(config, "Width: {}".format(config.FieldWidth)) + "\n"
-        GCODE += self.makeCommentedLine(config, "Length: {}".format(config.HorizontalTravel)) + "\n"
-        GCODE += self.makeCommentedLine(config, "Height: {}".format(config.VerticalTravel)) + "\n"
-        GCODE += "\n"
-
-        GCODE += self.makeCommentedLine(config, "*** FOAM BLOCK ***") + "\n"
-
-        GCODE += self.makeCommentedLine(config, "Width: {}".format(config.BlockWidth)) + "\n"
-        GCODE += self.makeCommentedLine(config, "Length: {}".format(config.BlockLength)) + "\n"
-        GCODE += self.makeCommentedLine(config, "Height: {}".format(config.BlockHeight)) + "\n"
-
-        GCODE += self.makeCommentedLine(config, "Position - Left-Bottom-Front corner in relation to the origin") + "\n"
-        GCODE += self.makeCommentedLine(config, "Position.X: {}".format(config.BlockPosition.x)) + "\n"
-        GCODE += self.makeCommentedLine(config, "Position.Y: {}".format(config.BlockPosition.y)) + "\n"
-        GCODE += self.makeCommentedLine(config, "Position.Z: {}".format(config.BlockPosition.z)) + "\n"
-        
-        GCODE += "\n"
-        GCODE += self.makeCommentedLine(config, "*** START BLOCK ***") + "\n"
-
-        GCODE += self.makeCommentedLine(config, "Set units to millimeters") + "\n"
-        GCODE += "G21\n"
-        GCODE += self.makeCommentedLine(config, "Set absolute positioning") + "\n"
-        GCODE += "G90\n"
-
-        if config.EnableHoming:
-            # - Homing
-            GCODE += self.makeCommentedLine(config, "- Homing -") + "\n"
-            GCODE += config.HomingCommand + "\n"
-
-            initPosCommand = self.generateTravelPosition(config,
-                config.HomingX1, config.HomingZ1, config.HomingX2, config.HomingZ2
-                )
-            
-            if config.FiveAxisMachine:
-                initPosCommand += " " + self.generateRotationPosition(config, config.HomingR1)
-
-            # - Initialize position
-            GCODE += config.InitPositionCommand.replace("{Position}", initPosCommand ) + "\n"
-
-        if config.EnableParking:
-            # - Park
-            GCODE += self.makeCommentedLine(config, "- Parking -") + "\n"
-            GCODE += self.generateRapidTravel(config, config.ParkX, config.ParkZ, config.ParkX, config.ParkZ )
-            if config.FiveAxisMachine:
-                GCODE += self.generateRotation(config, config.MoveCommand, config.ParkR1, config.FeedRateRotate)
-
-        # - Go to start point on parking Z if parking enabled
-        if start_point is not None:
-            start_L, start_R = start_point
-            if config.EnableParking:
-                GCODE += self.generateRapidTravel(config, start_L.y, config.ParkZ, start_R.y, config.ParkZ)
-
-        wirePower = config.WireMinPower
-        # - generate compensated wire power
-        if config.DynamicWirePower:
-            # - Calculate wire length
-            wire_length = start_L.distanceToPoint(start_R)
-            wirePower = self.generateWireCompensatedPower(config, wire_length)
-
-        # - Enable wire
-        GCODE += self.generateWireEnable(config, wirePower)
-
-        return GCODE
-
-    def generateEndBlock(self, config):
-        GCODE = "\n"
-        GCODE += self.makeCommentedLine(config, "*** END BLOCK ***") + "\n"
-
-        # - Disable wire
-        GCODE += self.generateWireDisable(config)
-
-        # - Up wire at current position to park height
-        if config.EnableParking:
-            GCODE += self.makeCommentedLine(config, "- Parking -") + "\n"
-            up_posistion  = "%s%.2f %s%.2f" % (config.Z1AxisName, config.ParkZ, config.Z2AxisName, config.ParkZ)
-            feed_rate     = config.FeedRateMove
-            GCODE += config.MoveCommand.replace("{Position}", up_posistion).replace("{FeedRate}", str(float(feed_rate) * 60)) + "\n"
-
-        # - Park XZ
-        if config.EnableParking:
-            GCODE += self.generateRapidTravel(config, config.ParkX, config.ParkZ, config.ParkX, config.ParkZ )
-            # - Park R1
-            if config.FiveAxisMachine:
-                GCODE += self.generateRotation(config, config.MoveCommand, config.ParkR1, config.FeedRateRotate)
-        
-        if config.EndProgramCode:
-            GCODE += "{}\n".format(config.EndProgramCode)
-            
-        return GCODE
-
-    '''
-    Make GCODE from rotation element
-    '''
-    def makeGCODEFromRotation(self, rt, config):
-        GCODE = "\n"
-        GCODE += self.makeCommentedLine(config, "- Rotation [{}] -".format(rt.Label)) + "\n"
-
-        # - Generate rotation command
-        GCODE += self.generateRotation(config, config.MoveCommand, rt.Angle, config.FeedRateRotate)
-        return GCODE
-
-    '''
-    Calculate dynamic power if needed and return gcode for command
-    '''
-    def getDynamicWirePowerCommand(self, point1, point2, power, config):
-        wirePowerCommand = ""
-        # - generate compensated wire power
-        if config.DynamicWirePower:
-            # - Calculate wire length
-            wire_length = point1.distanceToPoint(point2);
-            wirePowerCommand = "S%.2f" % (self.generateWireCompensatedPower(config, wire_length, power))
-        return wirePowerCommand
-    
-    '''
-    Generate GCODE from route
+    Generate GCODE from route and save it into the file
     '''
     def makeGCODE(self, route_list, config):
-        TASK = "\n"
-        # - Task GCODE buffer
-        TASK += self.makeCommentedLine(config, "*** TASK BLOCK ***") + "\n"
-        start_point = None
-
-        # find first point for start block
-        for route in route_list:
-            if len(route.Offset_L) > 0 and len(route.Offset_R) > 0:
-                start_point = (route.Offset_L[0], route.Offset_R[0])
-                break
-
-        # ---- Generate startup block
-        START = self.generateStartBlock(config, start_point)
-
-        # - Wal all routes
-        for route in route_list:
-            TASK += "\n"
-            TASK += self.makeCommentedLine(config, "--- Route begin [{}] ---".format(route.Label)) + "\n"
-
-            point_index = 0
-
-            if len(route.Offset_L) > 0 or len(route.Offset_R) > 0:                
-                # - Generate rapid travel command
-                TASK += self.generateRapidTravel(config, route.Offset_L[0].y, route.Offset_L[0].z, route.Offset_R[0].y, route.Offset_R[0].z)
-            
-            for i in range(len(route.Data)):                                
-                # - Access item
-                object_index = route.Data[i]
-                object = route.Objects[object_index]
-
-                if object.Type == "Rotation": # - Make GCODE from rotation
-                    TASK += self.makeGCODEFromRotation(object, config)
-                else:
-                    feed_override = route.FeedOverrides[i]
-
-                    
-                    addPause = object.AddPause if hasattr(object, "AddPause") else False
-                    duration = object.PauseDuration if hasattr(object, "PauseDuration") else 0
-                    feed = object.FeedRate if hasattr(object, "FeedRate") and object.FeedRate > 0 else config.FeedRateCut
-                    if feed_override > 1.0:
-                        feed = feed * feed_override
-                        
-                    power = float(object.WirePower) if hasattr(object, "WirePower") and object.WirePower > 0 else float(config.WireMinPower)
-                    isRapid = object.RapidMove if hasattr(object, "RapidMove") else False
-                    TASK += "\n"
-                    TASK += self.makeCommentedLine(config, "- {} [{}]".format(object.Type, object.Label)) + "\n"
-
-                    points_count = object.PointsCount if ( i == 0 or i == len(route.Data) - 1 or object.Type == "Exit" ) \
-                        else object.PointsCount - 1
-                    
-                    if object.Type == "Enter" and object.LeadInEnabled:
-                        points_count += 1
-
-                    if object.Type == "Exit" and object.LeadOutEnabled:
-                        points_count += 1
-
-                    # - Step over each point
-                    for p_idx in range(points_count):
-                        allowRapid = True
-
-                        # for enter and exit allow rapid move only for the last segment
-                        # lead-in and lead-out should be normal move to keep wire powered and prevent breakage
-                        if p_idx != points_count - 1 and object.Type == "Exit" and object.LeadOutEnabled:
-                            allowRapid = False
-
-                        if p_idx > 1 and object.Type == "Enter" and object.LeadInEnabled:
-                            allowRapid = False
-
-                        point_l = route.Offset_L[point_index]
-                        point_r = route.Offset_R[point_index]
-
-                        wirePowerCommand = self.getDynamicWirePowerCommand(point_l, point_r, power, config)
-
-                        if isRapid and allowRapid:
-                            # - Generate rapid travel command
-                            TASK += self.generateRapidTravel(config, point_l.y, point_l.z, point_r.y, point_r.z)
-                        else:
-                            # - Generate CUT travel command
-                            TASK += self.generateTravel(config, config.CutCommand, feed, wirePowerCommand, point_l.y, point_l.z, point_r.y, point_r.z)
-
-                        # - Increase point index
-                        point_index += 1
-                    
-                    if addPause and duration > 0:
-                        if config.TimeUnits == utilities.FC_TIME_UNITS[1]: #["Seconds", "Milliseconds"]
-                            duration = duration * 1000
-                        TASK += self.generatePause(config.PauseCommand, duration)
-            
-            TASK += self.makeCommentedLine(config, "--- Route end [{}] ---".format(route.Label)) + "\n"
-            TASK += "\n"
-
-        #generate end block        
-        END   = self.generateEndBlock(config)
-
-        program = START + ''.join(TASK) + END
-
-        print ("GCODE generated")
-
         dialog = QtGui.QFileDialog()
         lastDir = dialog.directory().absolutePath()
         # - Open save file dialog
@@ -345,11 +32,15 @@ class Postprocess():
             print ("GCODE saving aborted (no output file path specified)")
         else:
             try:
-                with open(save_path, "w") as f:
-                    f.write(program)
+                self.writeGCODE(save_path, self.generateGCODE(route_list, config))
+                print ("GCODE generated")
                 print ("GCODE saved into [%s]" % save_path)
-            except Exception:
-                App.Console.PrintError("Unable to save GCODE in [" + save_path + "]\n")
+
+                for stats in self.routes_stats + [self.program_stats]:
+                    print ("[%s] lines: %d, cut time: %.1fs, total time: %.1fs" % (stats.Label, stats.Lines, stats.CutTime, stats.toDict()["TotalTime"]))
+                print ("Report saved into [%s]" % self.writeReport(save_path))
+            except Exception as e:
+                App.Console.PrintError("Unable to save GCODE in [" + save_path + "]\n{}\n".format(e))
 
     def GetResources(self):
         return {"Pixmap"  : utilities.getIconPath("gcode.svg"), # the name of a svg file available in the resources
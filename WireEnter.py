@@ -44,6 +44,9 @@ class WireEnter(FoamCutBase.FoamCutMovementBaseObject):
         self.execute(obj)
 
     def onDocumentRestored(self, obj):
+        # - common movement migrations, like adaptive discretization properties
+        super().onDocumentRestored(obj)
+
         touched = False
         if not hasattr(obj, "LeadInEnabled"):
             obj.addProperty("App::PropertyBool",        "LeadInEnabled",    "Task",     "Add Lead-In").LeadInEnabled = False   
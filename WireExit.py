@@ -107,6 +107,9 @@ class WireExit(FoamCutBase.FoamCutMovementBaseObject):
             raise
 
     def onDocumentRestored(self, obj):
+        # - common movement migrations, like adaptive discretization properties
+        super().onDocumentRestored(obj)
+
         touched = False
         if not hasattr(obj, "LeadOutEnabled"):
             obj.addProperty("App::PropertyBool",        "LeadOutEnabled",    "Task",     "Add Lead-Out").LeadOutEnabled = False   
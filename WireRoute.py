@@ -15,30 +15,58 @@ from utilities import *
 import pivy.coin as coin
 import math
 import time
+import multiprocessing
+import numpy as np
 
 FC_KERF_STRATEGY_NONE = 0
 FC_KERF_STRATEGY_UNI = 1
 FC_KERF_STRATEGY_DYN = 2
+FC_KERF_STRATEGY_DYN_POINT = 3
 
-SUPPRESS_WARNINGS = getParameterBool("SuppressWarnings", True)
+FC_KERF_MAX_SPEED_RATIO = 10.0  # - Max local ratio of wire speeds on sides used by per point dynamic compensation
+
+EMPTY_POINTS = np.empty((0, 3))  # - Points of edge without points
+PARALLEL_KERF_MIN_POINTS = 20000    # - Min count of route points to compensate kerf in worker processes, smaller routes are faster in current process
+
+# - Route, segments and caches inherited by forked worker processes
+ROUTE_WORKER_STATE = None
+
+def compensateSegmentInWorker(index):
+    '''
+    Apply kerf compensation to route segment in worker process
+    @param index - index of the segment
+    @returns tuple (compensated segment, used edges offsets, used edges joins)
+    '''
+    route, segments, kerf, planes, cachedOffsets, cachedJoins = ROUTE_WORKER_STATE
+    return route.compensateSegment(segments[index], kerf, planes, cachedOffsets, cachedJoins)
 
 class FoamCut_RouteSegment():
+    __slots__ = ("Edges", "LastPoint", "LeftPlaneX", "RightPlaneX", "SimpleProjection")
+
     def __init__(self):
         self.Edges = []
         self.LastPoint = 0
         self.LeftPlaneX = 0.0
         self.RightPlaneX = 0.0
-        self.PathLeft = []
-        self.PathRight = []
         self.SimpleProjection = False
 
 class FoamCut_RouteEdge():
+    '''
+    Route edge. Points and offsets are (N, 3) arrays, reversed edges keep views of source points
+    '''
+    __slots__ = ("PointsCount", "PointsLeft", "PointsRight", "OffsetLeft", "OffsetRight", "OffsetLenLeft", "OffsetLenRight",
+                 "CompensationDirection", "LeftEdgeLength", "RightEdgeLength", "LeftSegmentLength", "RightSegmentLength",
+                 "PauseDuration", "DataIdx", "ObjectType")
+
+    # - fields set by projectToPlanes and makeOffset
+    OFFSET_STATE = ["PointsLeft", "PointsRight", "LeftEdgeLength", "RightEdgeLength", "OffsetLenLeft", "OffsetLenRight", "OffsetLeft", "OffsetRight"]
+
     def __init__(self):
         self.PointsCount = 0
-        self.PointsLeft = []
-        self.PointsRight = []
-        self.OffsetLeft = []
-        self.OffsetRight = []
+        self.PointsLeft = EMPTY_POINTS
+        self.PointsRight = EMPTY_POINTS
+        self.OffsetLeft = EMPTY_POINTS
+        self.OffsetRight = EMPTY_POINTS
         self.OffsetLenLeft = 0
         self.OffsetLenRight = 0
         self.CompensationDirection = 0
@@ -56,31 +84,41 @@ class FoamCut_RouteEdge():
             # edge is too short or a single point - no need to make offset
             return
         
-        projectedLeft = []
-        projectedRight = []
-
-        for i in range(len(self.PointsLeft)):
-            projectedLeft.append(intersectLineAndPlane(self.PointsLeft[i], self.PointsRight[i], leftPlane))
-            projectedRight.append(intersectLineAndPlane(self.PointsLeft[i], self.PointsRight[i], rightPlane))
+        projectedLeft = intersectLinesAndPlane(self.PointsLeft, self.PointsRight, leftPlane)
+        projectedRight = intersectLinesAndPlane(self.PointsLeft, self.PointsRight, rightPlane)
 
         self.PointsLeft = projectedLeft
         self.PointsRight = projectedRight
 
         # recalculate edges length
-        path_L = Part.BSplineCurve()
-        path_L.approximate(Points = projectedLeft, Continuity="C0")
+        self.LeftEdgeLength = getPolylineLength(projectedLeft)
+        self.RightEdgeLength = getPolylineLength(projectedRight)
 
-        path_R = Part.BSplineCurve()
-        path_R.approximate(Points = projectedRight, Continuity="C0")
-        
-        self.LeftEdgeLength = float(path_L.length())
-        self.RightEdgeLength = float(path_R.length())
+    def projectOffsetToPlanes(self, leftPlane, rightPlane):
+        '''
+        Project offset points to working planes
+        @param leftPlane - left working plane
+        @param rightPlane - right working plane
+        '''
+        offset_L = self.OffsetLeft[:self.PointsCount]
+        offset_R = self.OffsetRight[:self.PointsCount]
 
-    def makeOffset(self, dynamic = False, degree=1.0):
+        self.OffsetLeft = intersectLinesAndPlane(offset_L, offset_R, leftPlane)
+        self.OffsetRight = intersectLinesAndPlane(offset_L, offset_R, rightPlane)
+
+    def makeOffset(self, dynamic = False, degree=1.0, perPoint = False):
         if self.PointsCount <= 1 or self.LeftEdgeLength <= 1e-2 or self.RightEdgeLength <= 1e-2:
             # edge is too short or a single point - no need to make offset
             return
         
+        if dynamic and perPoint and len(self.PointsLeft) == len(self.PointsRight):
+            # compensation changes along the edge with local wire speed
+            (compensationLeft, compensationRight) = self.getLocalCompensation(degree)
+
+            self.OffsetLeft = offsetPolyline(self.PointsLeft, self.OffsetLenLeft * compensationLeft)
+            self.OffsetRight = offsetPolyline(self.PointsRight, self.OffsetLenRight * compensationRight)
+            return
+
         if dynamic:
             #calculate compensation for the sides
             ratio = max(self.LeftEdgeLength, self.RightEdgeLength) / min(self.LeftEdgeLength, self.RightEdgeLength)
@@ -101,10 +139,52 @@ class FoamCut_RouteEdge():
         # print(f"Offset_L_{self.ObjectType} compensated offset: {self.OffsetLenLeft}")
         # print(f"Offset_R_{self.ObjectType} compensated offset: {self.OffsetLenRight}")
 
-        lWire = makeWireOffset(makeWire(self.PointsLeft), self.OffsetLenLeft)
-        rWire = makeWireOffset(makeWire(self.PointsRight), self.OffsetLenRight)        
-        self.OffsetLeft = [v.Point for v in lWire.Vertexes]
-        self.OffsetRight = [v.Point for v in rWire.Vertexes]
+        self.OffsetLeft = offsetPolyline(self.PointsLeft, self.OffsetLenLeft)
+        self.OffsetRight = offsetPolyline(self.PointsRight, self.OffsetLenRight)
+
+    def getLocalCompensation(self, degree):
+        '''
+        Get compensation of each point pair by local ratio of wire speeds on sides.
+        Local speed is taken from length of segments adjacent to the point, slower side gets more compensation
+        @param degree - compensation degree
+        @returns tuple of (N,) arrays (left compensation, right compensation)
+        '''
+        lengths_L = np.linalg.norm(np.diff(self.PointsLeft, axis=0), axis=1)
+        lengths_R = np.linalg.norm(np.diff(self.PointsRight, axis=0), axis=1)
+
+        # - length of both segments adjacent to the point
+        local_L = np.append(lengths_L, 0.0) + np.insert(lengths_L, 0, 0.0)
+        local_R = np.append(lengths_R, 0.0) + np.insert(lengths_R, 0, 0.0)
+
+        ratio = np.ones(len(local_L))
+        moving = (local_L > 1e-9) | (local_R > 1e-9)
+        ratio[moving] = local_L[moving] / np.maximum(local_R[moving], 1e-9)
+        ratio = np.clip(ratio, 1.0 / FC_KERF_MAX_SPEED_RATIO, FC_KERF_MAX_SPEED_RATIO)
+
+        # - same as for whole edge: side with shorter path is slower
+        compensationLeft = np.maximum(1.0 / ratio, 1.0)
+        compensationRight = np.maximum(ratio, 1.0)
+
+        if degree > 1:
+            compensationLeft **= degree
+            compensationRight **= degree
+
+        return (compensationLeft, compensationRight)
+
+    def getOffsetState(self):
+        '''
+        Get results of projection and offset of the edge
+        @returns tuple of OFFSET_STATE fields values
+        '''
+        return tuple(getattr(self, name) for name in FoamCut_RouteEdge.OFFSET_STATE)
+
+    def setOffsetState(self, state):
+        '''
+        Restore results of projection and offset of the edge
+        @param state - tuple of OFFSET_STATE fields values
+        '''
+        for name, value in zip(FoamCut_RouteEdge.OFFSET_STATE, state):
+            setattr(self, name, value)
 
     def getFeedOverride(self):
         maxEdgeLength = max(self.LeftEdgeLength, self.RightEdgeLength)
@@ -129,6 +209,8 @@ class WireRoute(FoamCutBase.FoamCutBaseObject):
 
         obj.addProperty("App::PropertyFloatList",   "FeedOverrides",  "", "", 5) 
 
+        obj.addProperty("App::PropertyIntegerList", "PointsCounts",     "", "", 5) # count of route points for each data item
+
         obj.addProperty("App::PropertyInteger",     "Redraw",           "", "", 5).Redraw = 0 # property to tgger view provider to update 
 
         obj.addProperty("App::PropertyLinkList",    "Objects",          "Task",   "Source data").Objects = objects
@@ -142,7 +224,8 @@ class WireRoute(FoamCutBase.FoamCutBaseObject):
         obj.addProperty("App::PropertyEnumeration", "CompensationStrategy",     "Kerf Compensation",   "Kerf compensation strategy. \r\n\
                             None - do no compensate for kerf. \r\n\
                             Uniform - same amount of compensation on both sides. Doesn'd take into account wire speed. \r\n\
-                            Dynamic - compensation depends on wire speed (that depends on edge length). Slower speed - more compensation.").CompensationStrategy = FC_KERF_STRATEGY 
+                            Dynamic - compensation depends on wire speed (that depends on edge length). Slower speed - more compensation. \r\n\
+                            Dynamic per point - compensation depends on local wire speed at each point, for tapered and twisted edges.").CompensationStrategy = FC_KERF_STRATEGY 
         obj.CompensationStrategy = 0   
 
         obj.addProperty("App::PropertyFloat",     "CompensationDegree",        "Kerf Compensation",    "Kerf Compensation coefficient. \r\n\
@@ -151,6 +234,10 @@ class WireRoute(FoamCutBase.FoamCutBaseObject):
                         But in some foams it will not be that simple, since wire melts foam and it became dencer. \r\n\
                         Normally it should be 1.0, but for denser foam it could be bigger.")
         obj.setEditorMode("CompensationDegree", 2)
+
+        obj.addProperty("App::PropertyBool",        "Simplify",          "Simplification",   "Remove points where both sides are within tolerance of simplified route").Simplify = getParameterBool("Simplify", False)
+        obj.addProperty("App::PropertyLength",      "SimplifyTolerance", "Simplification",   "Max distance of removed points from simplified route").SimplifyTolerance = getParameterFloat("SimplifyTolerance", 0.01)
+
         config = self.getConfigName(obj)
 
         obj.setExpression(".KerfCompensation", u"<<{}>>.KerfCompensation".format(config))
@@ -158,6 +245,21 @@ class WireRoute(FoamCutBase.FoamCutBaseObject):
         
         obj.Proxy = self
         self.execute(obj)
+
+    # - Kerf compensation results of last recompute are kept in Cache of the proxy, so they are released
+    #   together with the route. They are not saved with document and are rebuilt on first recompute
+    if isNewStateHandling():
+        def dumps(self):
+            return None
+
+        def loads(self, state):
+            return None
+    else:
+        def __getstate__(self):
+            return None
+
+        def __setstate__(self, state):
+            return None
     
     def onDocumentRestored(self, obj):
         touched = False
@@ -172,7 +274,8 @@ class WireRoute(FoamCutBase.FoamCutBaseObject):
             obj.addProperty("App::PropertyEnumeration", "CompensationStrategy",    "Kerf Compensation",   "Kerf compensation strategy. \r\n\
                             None - do no compensate for kerf. \r\n\
                             Uniform - same amount of compensation on both sides. Doesn'd take into account wire speed. \r\n\
-                            Dynamic - compensation depends on wire speed (that depends on edge length). Slower speed - more compensation.").CompensationStrategy = FC_KERF_STRATEGY 
+                            Dynamic - compensation depends on wire speed (that depends on edge length). Slower speed - more compensation. \r\n\
+                            Dynamic per point - compensation depends on local wire speed at each point, for tapered and twisted edges.").CompensationStrategy = FC_KERF_STRATEGY 
             obj.CompensationStrategy = FC_KERF_STRATEGY.index("Dynamic") if dynamic else 0
                                
             print("{} - Migrating from 0.1.2 to 0.1.3 - adding CompensationStrategy property.".format(obj.Label))
@@ -190,6 +293,12 @@ class WireRoute(FoamCutBase.FoamCutBaseObject):
             print("{} - Migrating from 0.1.2 to 0.1.3 - adding CompensationDegree property.".format(obj.Label))
             touched = True
 
+        if obj.getEnumerationsOfProperty("CompensationStrategy") != FC_KERF_STRATEGY:
+            strategy = obj.CompensationStrategy
+            obj.CompensationStrategy = FC_KERF_STRATEGY
+            obj.CompensationStrategy = strategy
+            print("{} - Migrating from 0.1.12 to 0.1.13 - add Dynamic per point kerf compensation strategy.".format(obj.Label))
+
         if hasattr(obj, "KerfCompensation") and obj.getGroupOfProperty("KerfCompensation") != "Kerf Compensation":
             obj.setGroupOfProperty("KerfCompensation", "Kerf Compensation")
         
@@ -209,6 +318,16 @@ class WireRoute(FoamCutBase.FoamCutBaseObject):
             obj.addProperty("App::PropertyFloatList",   "FeedOverrides",  "", "", 5) 
             print("{} - Migrating from 0.1.10 to 0.1.11 - adding FeedOverrides property.".format(obj.Label))
             touched = True
+
+        if not hasattr(obj, "PointsCounts"):
+            obj.addProperty("App::PropertyIntegerList", "PointsCounts",     "", "", 5)
+            print("{} - Migrating from 0.1.12 to 0.1.13 - adding PointsCounts property.".format(obj.Label))
+            touched = True
+
+        if not hasattr(obj, "Simplify"):
+            obj.addProperty("App::PropertyBool",        "Simplify",          "Simplification",   "Remove points where both sides are within tolerance of simplified route").Simplify = getParameterBool("Simplify", False)
+            obj.addProperty("App::PropertyLength",      "SimplifyTolerance", "Simplification",   "Max distance of removed points from simplified route").SimplifyTolerance = getParameterFloat("SimplifyTolerance", 0.01)
+            print("{} - Migrating from 0.1.12 to 0.1.13 - adding Simplify property.".format(obj.Label))
             
         if touched:
             obj.recompute()
@@ -217,8 +336,6 @@ class WireRoute(FoamCutBase.FoamCutBaseObject):
         # start_time = time.perf_counter()
 
         try:
-            config = self.getConfig(obj)
-
             doc = obj.Document
 
             job = doc.getObject(obj.JobName)
@@ -389,7 +506,7 @@ class WireRoute(FoamCutBase.FoamCutBaseObject):
             obj.Data = route_data
             obj.DataDirection = route_data_dir
 
-            # - try to make a offset       
+            # - try to make a offset, route is built from arrays of points
             resultPoints_L = []
             resultPoints_R = []
 
@@ -431,8 +548,11 @@ class WireRoute(FoamCutBase.FoamCutBaseObject):
                 currentEdge.LeftSegmentLength = float(object.LeftSegmentLength) if object.LeftSegmentLength > 0 else 0.1
                 currentEdge.RightSegmentLength = float(object.RightSegmentLength) if object.RightSegmentLength > 0 else 0.1
 
-                currentEdge.PointsLeft = currentEdge.OffsetLeft = object.Path_L[::-1] if route_data_dir[i] else object.Path_L
-                currentEdge.PointsRight = currentEdge.OffsetRight = object.Path_R[::-1] if route_data_dir[i] else object.Path_R
+                # - reversed points are views of source points, not copies
+                points_L = vectorsToArray(object.Path_L)
+                points_R = vectorsToArray(object.Path_R)
+                currentEdge.PointsLeft = currentEdge.OffsetLeft = points_L[::-1] if route_data_dir[i] else points_L
+                currentEdge.PointsRight = currentEdge.OffsetRight = points_R[::-1] if route_data_dir[i] else points_R
 
                 currentSegment.LastPoint += pointsCount - 1
 
@@ -458,136 +578,24 @@ class WireRoute(FoamCutBase.FoamCutBaseObject):
 
             applyKerf = obj.KerfCompensation > 0 and FC_KERF_STRATEGY.index(obj.CompensationStrategy) > FC_KERF_STRATEGY_NONE
 
+            # - results of last recompute, only changed edges and joins with their neighbours are recomputed
+            (cachedOffsets, cachedJoins) = getattr(self, "Cache", ({}, {}))
+            offsets = {}
+            joins = {}
+
             # apply kerf compensation if needed
             if applyKerf:
-                # build temporary planes for projection
-                # and make offsets from resulted projections
-                for i, segment in enumerate(segments):                
-                    norm = App.Vector(1.0, 0.0, 0.0)
-                    xdir = App.Vector(0.0, 1.0, 0.0)
-                    leftPlane = Part.makePlane(float(config.HorizontalTravel), float(config.VerticalTravel), App.Vector(segment.LeftPlaneX, float(-config.OriginX), 0), norm, xdir)
-                    rightPlane = Part.makePlane(float(config.HorizontalTravel), float(config.VerticalTravel), App.Vector(segment.RightPlaneX, float(-config.OriginX), 0), norm, xdir)
-
-                    for j, edge in enumerate(segment.Edges):
-                        idx = FC_KERF_DIRECTIONS.index(edge.CompensationDirection) if edge.CompensationDirection in FC_KERF_DIRECTIONS else 0                    
-                        dir = -1 * (idx - 1) if obj.CompensationDirection in FC_ROUTE_KERF_DIRECTIONS and FC_ROUTE_KERF_DIRECTIONS.index(obj.CompensationDirection) == 1 else idx - 1
-                    
-                        edge.OffsetLenLeft = float(obj.KerfCompensation) * dir
-                        edge.OffsetLenRight = float(obj.KerfCompensation) * dir
-
-                        dynamicOffset = False
-                        if not segment.SimpleProjection:
-                            #project edges from working planes to temp planes
-                            edge.projectToPlanes(leftPlane, rightPlane)
-
-                            dynamicOffset = dir != 0 and FC_KERF_STRATEGY.index(obj.CompensationStrategy) == FC_KERF_STRATEGY_DYN                       
+                reversedDirection = obj.CompensationDirection in FC_ROUTE_KERF_DIRECTIONS and FC_ROUTE_KERF_DIRECTIONS.index(obj.CompensationDirection) == 1
+                kerf = (float(obj.KerfCompensation), reversedDirection, FC_KERF_STRATEGY.index(obj.CompensationStrategy), float(obj.CompensationDegree))
+                planes = (getPlaneOriginAndNormal(wpl), getPlaneOriginAndNormal(wpr))
 
-                        # compute offsets
-                        edge.makeOffset(dynamicOffset, obj.CompensationDegree)
+                compensated = self.compensateSegments(segments, kerf, planes, cachedOffsets, cachedJoins)
 
-                # intersect offsets and build final route points
-                for i, segment in enumerate(segments):
-                    firstWire_L = secondWire_L = None
-                    firstWire_R = secondWire_R = None
-                    
-                    last_point_L = None
-                    last_point_R = None
-
-                    for j in range(len(segment.Edges) - 1):
-                        edge = segment.Edges[j]
-                        if firstWire_L == None and firstWire_R == None:
-                            firstWire_L = makeWire(edge.OffsetLeft)
-                            firstWire_R = makeWire(edge.OffsetRight)
-                        
-                        if secondWire_L == None and secondWire_R == None:
-                            secondWire_L = makeWire(segment.Edges[j + 1].OffsetLeft)
-                            secondWire_R = makeWire(segment.Edges[j + 1].OffsetRight)
-
-                        try:
-                            ileft = intersectWires(firstWire_L, secondWire_L, tolerance=5e-3)
-                        except Exception as e:
-                            # p = Part.show(Part.Vertex(ileft[0]), "Trim point")
-                            # p.ViewObject.PointSize = 6
-                            # Part.show(firstWire_L, "first wire")
-                            # Part.show(secondWire_L, "second wire")
-                            # print(f"Failed to trim wire. Info: {ileft}")
-                            raise Exception(f"ERROR: {e}")
-                        
-                        try:
-                            iright = intersectWires(firstWire_R, secondWire_R, tolerance=5e-3)
-                        except Exception as e:
-                            raise Exception(f"ERROR: {e}")
-                        
-                        try:
-                            off = connectWires(firstWire_L, secondWire_L, ileft)
-                        except Exception as e:
-                            # p = Part.show(Part.Vertex(ileft[0]), "Trim point")
-                            # p.ViewObject.PointSize = 6
-                            # Part.show(firstWire_L, "first wire")
-                            # Part.show(secondWire_L, "second wire")
-                            # print(f"Failed to trim wire. Info: {ileft}")
-                            raise Exception(f"ERROR: LEFT OFFSET Something wrong near point: {ileft}; idx: {j}. Exception: {e}")
-                            
-                        if off == None:
-                            raise Exception(f"ERROR: LEFT OFFSET Something wrong near point: {ileft}; idx: {j}")
-                        
-                        # - discretize wire so it will have same count of vertices as source wire
-                        edge.OffsetLeft = self.getWirepoints(off[0], edge.PointsCount) if edge.PointsCount > 1 else [ileft[0]]
-
-                        firstWire_L = off[1]
-                        secondWire_L = None
-
-                        # save last offset point
-                        last_point_L = edge.OffsetLeft[-1]
-
-                        try:
-                            off = connectWires(firstWire_R, secondWire_R, iright)
-                        except Exception as e:
-                            # p = Part.show(Part.Vertex(iright[0]), "Trim point")
-                            # p.ViewObject.PointSize = 6
-                            # Part.show(firstWire_R, "first wire")
-                            # Part.show(secondWire_R, "second wire")
-                            # print(f"Failed to trim wire. Info: {iright}")
-                            raise Exception(f"ERROR: RIGHT OFFSET Something wrong near point: {iright}; idx: {j}. Exception: {e}")
-                        
-                        if off == None:
-                            raise Exception(f"ERROR: RIGHT OFFSET Something wrong near point: {iright}; idx: {j}")
-                        
-                        # - discretize wire so it will have same count of vertices as source wire
-                        edge.OffsetRight = self.getWirepoints(off[0], edge.PointsCount) if edge.PointsCount > 1 else [iright[0]]
-
-                        firstWire_R = off[1]
-                        secondWire_R = None
-
-                        # save last offset point
-                        last_point_R = edge.OffsetRight[-1]
-
-                        if not segment.SimpleProjection:
-                            left_Off = []
-                            right_off = []
-                            for p in range(edge.PointsCount):
-                                left_Off.append(intersectLineAndPlane(edge.OffsetLeft[p], edge.OffsetRight[p], wpl))
-                                right_off.append(intersectLineAndPlane(edge.OffsetLeft[p], edge.OffsetRight[p], wpr))
-                            edge.OffsetLeft = left_Off
-                            edge.OffsetRight = right_off
-
-                    # add last edge points
-                    edge = segment.Edges[-1]
-                    if firstWire_L is not None and firstWire_R is not None:                  
-                        edge.OffsetLeft = self.getWirepoints(firstWire_L, edge.PointsCount)
-                        edge.OffsetRight = self.getWirepoints(firstWire_R, edge.PointsCount)
-                    elif edge.PointsCount == 1 and last_point_L is not None and last_point_R is not None:
-                        edge.OffsetLeft = [last_point_L]
-                        edge.OffsetRight = [last_point_R]
-
-                    if not segment.SimpleProjection:
-                        left_Off = []
-                        right_off = []
-                        for p in range(edge.PointsCount):                            
-                            left_Off.append(intersectLineAndPlane(edge.OffsetLeft[p], edge.OffsetRight[p], wpl))
-                            right_off.append(intersectLineAndPlane(edge.OffsetLeft[p], edge.OffsetRight[p], wpr))
-                        edge.OffsetLeft = left_Off
-                        edge.OffsetRight = right_off
+                segments = []
+                for (segment, segmentOffsets, segmentJoins) in compensated:
+                    segments.append(segment)
+                    offsets.update(segmentOffsets)
+                    joins.update(segmentJoins)
 
             # build route from segments and edges
             for i, segment in enumerate(segments):
@@ -598,36 +606,30 @@ class WireRoute(FoamCutBase.FoamCutBaseObject):
                         if edge.ObjectType == "Enter":
                             object = obj.Objects[route_data[edge.DataIdx]]
                             # add plunge down line
-                            plunge_L = App.Vector(edge.OffsetLeft[0].x, edge.OffsetLeft[0].y, float(object.SafeHeight))
-                            plunge_R = App.Vector(edge.OffsetRight[0].x, edge.OffsetRight[0].y, float(object.SafeHeight))
-
-                            resultPoints_L.append(plunge_L)
-                            resultPoints_R.append(plunge_R)
+                            resultPoints_L.append(self.getPlungePoint(edge.OffsetLeft[0], object.SafeHeight))
+                            resultPoints_R.append(self.getPlungePoint(edge.OffsetRight[0], object.SafeHeight))
 
                             # plunge-down start point not included in offset points, but reflected in points count
                             pointsCount -= 1
 
-                        for idx in range(pointsCount - 1):
-                            resultPoints_L.append(edge.OffsetLeft[idx])
-                            resultPoints_R.append(edge.OffsetRight[idx])
+                        if pointsCount > 1:
+                            resultPoints_L.append(edge.OffsetLeft[:pointsCount - 1])
+                            resultPoints_R.append(edge.OffsetRight[:pointsCount - 1])
                         
                         if edge.ObjectType == "Exit":
                             object = obj.Objects[route_data[edge.DataIdx]]
                             # add last point of the edge as plunge down line start point.
-                            resultPoints_L.append(edge.OffsetLeft[-1])
-                            resultPoints_R.append(edge.OffsetRight[-1])
+                            resultPoints_L.append(edge.OffsetLeft[-1:])
+                            resultPoints_R.append(edge.OffsetRight[-1:])
 
                             # add plunge up line
-                            plunge_L = App.Vector(edge.OffsetLeft[-1].x, edge.OffsetLeft[-1].y, float(object.SafeHeight))
-                            plunge_R = App.Vector(edge.OffsetRight[-1].x, edge.OffsetRight[-1].y, float(object.SafeHeight))
-
-                            resultPoints_L.append(plunge_L)
-                            resultPoints_R.append(plunge_R)
+                            resultPoints_L.append(self.getPlungePoint(edge.OffsetLeft[-1], object.SafeHeight))
+                            resultPoints_R.append(self.getPlungePoint(edge.OffsetRight[-1], object.SafeHeight))
 
                         # add last point of the last edge. except for exit - it's last point already added as plunge-up line
                         if j == len(segment.Edges) - 1 and edge.ObjectType != "Exit":
-                            resultPoints_L.append(edge.OffsetLeft[-1])
-                            resultPoints_R.append(edge.OffsetRight[-1])
+                            resultPoints_L.append(edge.OffsetLeft[-1:])
+                            resultPoints_R.append(edge.OffsetRight[-1:])
                         
                         feed_overrides.append(edge.getFeedOverride())
                 else:
@@ -635,19 +637,226 @@ class WireRoute(FoamCutBase.FoamCutBaseObject):
 
             if len(feed_overrides) != len(obj.Data):
                 raise Exception("ERROR: Feed overrides calculation error.")
+
+            resultPoints_L = np.concatenate(resultPoints_L) if len(resultPoints_L) > 0 else EMPTY_POINTS
+            resultPoints_R = np.concatenate(resultPoints_R) if len(resultPoints_R) > 0 else EMPTY_POINTS
             
-            obj.Offset_L = resultPoints_L
-            obj.Offset_R = resultPoints_R
+            pointsCounts = getRoutePointsCounts(route_data, obj.Objects)
+
+            if hasattr(obj, "Simplify") and obj.Simplify and len(resultPoints_L) > 2:
+                keep = self.simplifyRoute(obj, route_data, pointsCounts, resultPoints_L, resultPoints_R)
+
+                # - points removed from each data item
+                start = 0
+                for i in range(len(pointsCounts)):
+                    count = pointsCounts[i]
+                    pointsCounts[i] = int(keep[start:start + count].sum())
+                    start += count
+
+                # - indexes of kept points
+                indexes = np.cumsum(keep) - 1
+                pauses = [int(indexes[min(idx, len(indexes) - 1)]) for idx in pauses]
+                breaks = [int(indexes[min(idx, len(indexes) - 1)]) for idx in breaks]
+
+                resultPoints_L = resultPoints_L[keep]
+                resultPoints_R = resultPoints_R[keep]
+
+            # - points are converted to vectors only once, when stored in properties
+            obj.Offset_L = arrayToVectors(resultPoints_L)
+            obj.Offset_R = arrayToVectors(resultPoints_R)
+            obj.PointsCounts = pointsCounts
             obj.Pauses = pauses
             obj.PausesDurations = pausesDuration
             obj.RouteBreaks = breaks
             obj.FeedOverrides = feed_overrides
 
+            self.Cache = (offsets, joins)
+
             obj.Redraw += 1 #change of this property will trigger VP to redraw
         except Exception as e:
             FreeCAD.Console.PrintError(f"Route {obj.Label} {e}\n")
             raise
 
+    def compensateSegments(self, segments, kerf, planes, cachedOffsets, cachedJoins):
+        '''
+        Apply kerf compensation to route segments.
+        Segments are independent, so big routes are compensated in worker processes and merged in the same order,
+        if parallel computations are enabled by ParallelWorkers parameter.
+        @param segments - list of FoamCut_RouteSegment
+        @param kerf - tuple (kerf compensation, is route direction reversed, compensation strategy, compensation degree)
+        @param planes - tuple of left and right working planes as (origin, normal)
+        @param cachedOffsets - edges offsets from last recompute
+        @param cachedJoins - edges joins from last recompute
+        @return list of (compensated segment, used edges offsets, used edges joins)
+        '''
+        global ROUTE_WORKER_STATE
+
+        pointsCount = sum(edge.PointsCount for segment in segments for edge in segment.Edges)
+        workers = getWorkersCount(len(segments)) if pointsCount >= PARALLEL_KERF_MIN_POINTS else 1
+
+        if workers <= 1:
+            return [self.compensateSegment(segment, kerf, planes, cachedOffsets, cachedJoins) for segment in segments]
+
+        # - workers are forked, so they get segments and caches without pickling
+        ROUTE_WORKER_STATE = (self, segments, kerf, planes, cachedOffsets, cachedJoins)
+        try:
+            with multiprocessing.get_context("fork").Pool(workers) as pool:
+                return pool.map(compensateSegmentInWorker, range(len(segments)))
+        finally:
+            ROUTE_WORKER_STATE = None
+
+    def compensateSegment(self, segment, kerf, planes, cachedOffsets, cachedJoins):
+        '''
+        Make offsets of segment edges, join them and project back to working planes.
+        Works on points only, so it could be run in worker process.
+        @param segment - FoamCut_RouteSegment
+        @param kerf - tuple (kerf compensation, is route direction reversed, compensation strategy, compensation degree)
+        @param planes - tuple of left and right working planes as (origin, normal)
+        @param cachedOffsets - edges offsets from last recompute
+        @param cachedJoins - edges joins from last recompute
+        @return tuple (segment, used edges offsets, used edges joins)
+        '''
+        (kerfCompensation, reversedDirection, strategy, degree) = kerf
+        (wpl, wpr) = planes
+
+        offsets = {}
+        joins = {}
+
+        if len(segment.Edges) == 0:
+            return (segment, offsets, joins)
+
+        # temporary planes for projection
+        norm = np.array((1.0, 0.0, 0.0))
+        leftPlane = (np.array((segment.LeftPlaneX, 0.0, 0.0)), norm)
+        rightPlane = (np.array((segment.RightPlaneX, 0.0, 0.0)), norm)
+
+        # make offsets from projections
+        for edge in segment.Edges:
+            idx = FC_KERF_DIRECTIONS.index(edge.CompensationDirection) if edge.CompensationDirection in FC_KERF_DIRECTIONS else 0
+            dir = -1 * (idx - 1) if reversedDirection else idx - 1
+
+            edge.OffsetLenLeft = kerfCompensation * dir
+            edge.OffsetLenRight = kerfCompensation * dir
+
+            dynamicOffset = not segment.SimpleProjection and dir != 0 and strategy in [FC_KERF_STRATEGY_DYN, FC_KERF_STRATEGY_DYN_POINT]
+            perPoint = strategy == FC_KERF_STRATEGY_DYN_POINT
+
+            # - offset depends on edge points (in route direction), kerf settings and temp planes only
+            key = (getPointsKey(edge.PointsLeft), getPointsKey(edge.PointsRight), edge.PointsCount,
+                   edge.LeftEdgeLength, edge.RightEdgeLength, edge.OffsetLenLeft, edge.OffsetLenRight,
+                   dynamicOffset, perPoint, degree, None if segment.SimpleProjection else (segment.LeftPlaneX, segment.RightPlaneX))
+
+            state = cachedOffsets.get(key)
+            if state is not None:
+                edge.setOffsetState(state)
+            else:
+                if not segment.SimpleProjection:
+                    #project edges from working planes to temp planes
+                    edge.projectToPlanes(leftPlane, rightPlane)
+
+                # compute offsets
+                edge.makeOffset(dynamicOffset, degree, perPoint)
+                state = edge.getOffsetState()
+
+            offsets[key] = state
+
+        # intersect offsets and build final route points
+        firstWire_L = secondWire_L = None
+        firstWire_R = secondWire_R = None
+        
+        last_point_L = None
+        last_point_R = None
+
+        for j in range(len(segment.Edges) - 1):
+            edge = segment.Edges[j]
+            if firstWire_L is None and firstWire_R is None:
+                firstWire_L = self.getPolyline(edge.OffsetLeft)
+                firstWire_R = self.getPolyline(edge.OffsetRight)
+            
+            if secondWire_L is None and secondWire_R is None:
+                secondWire_L = self.getPolyline(segment.Edges[j + 1].OffsetLeft)
+                secondWire_R = self.getPolyline(segment.Edges[j + 1].OffsetRight)
+
+            # - join depends on edges offsets only, so it's recomputed for changed edges and their neighbours
+            key = (getPointsKey(firstWire_L), getPointsKey(firstWire_R), getPointsKey(secondWire_L), getPointsKey(secondWire_R), edge.PointsCount)
+
+            joined = cachedJoins.get(key)
+            if joined is None:
+                joined = self.joinEdgeOffsets(edge, j, firstWire_L, firstWire_R, secondWire_L, secondWire_R)
+            joins[key] = joined
+
+            (edge.OffsetLeft, edge.OffsetRight, firstWire_L, firstWire_R) = joined
+            secondWire_L = secondWire_R = None
+
+            # save last offset points
+            last_point_L = edge.OffsetLeft[-1:]
+            last_point_R = edge.OffsetRight[-1:]
+
+            if not segment.SimpleProjection:
+                edge.projectOffsetToPlanes(wpl, wpr)
+
+        # add last edge points
+        edge = segment.Edges[-1]
+        if firstWire_L is not None and firstWire_R is not None:                  
+            edge.OffsetLeft = self.getWirepoints(firstWire_L, edge.PointsCount)
+            edge.OffsetRight = self.getWirepoints(firstWire_R, edge.PointsCount)
+        elif edge.PointsCount == 1 and last_point_L is not None and last_point_R is not None:
+            edge.OffsetLeft = last_point_L
+            edge.OffsetRight = last_point_R
+
+        if not segment.SimpleProjection:
+            edge.projectOffsetToPlanes(wpl, wpr)
+
+        return (segment, offsets, joins)
+
+    def joinEdgeOffsets(self, edge, j, firstWire_L, firstWire_R, secondWire_L, secondWire_R):
+        '''
+        Intersect offsets of the edge and the next edge, trim/extend them to the point of intersection
+        @param edge - route edge, joined offsets are discretized into its points count
+        @param j - index of the edge in segment
+        @param firstWire_L - (N, 3) array of left offset of the edge or None
+        @param firstWire_R - (N, 3) array of right offset of the edge or None
+        @param secondWire_L - (M, 3) array of left offset of the next edge or None
+        @param secondWire_R - (M, 3) array of right offset of the next edge or None
+        @return tuple (left offset points, right offset points, rest of next edge left offset, rest of next edge right offset)
+        '''
+        try:
+            ileft = intersectPolylines(firstWire_L, secondWire_L, tolerance=5e-3)
+        except Exception as e:
+            raise Exception(f"ERROR: {e}")
+        
+        try:
+            iright = intersectPolylines(firstWire_R, secondWire_R, tolerance=5e-3)
+        except Exception as e:
+            raise Exception(f"ERROR: {e}")
+        
+        try:
+            off_L = connectPolylines(firstWire_L, secondWire_L, ileft)
+        except Exception as e:
+            # p = Part.show(Part.Vertex(ileft[0]), "Trim point")
+            # p.ViewObject.PointSize = 6
+            # Part.show(firstWire_L, "first wire")
+            # Part.show(secondWire_L, "second wire")
+            # print(f"Failed to trim wire. Info: {ileft}")
+            raise Exception(f"ERROR: LEFT OFFSET Something wrong near point: {ileft}; idx: {j}. Exception: {e}")
+            
+        if off_L == None:
+            raise Exception(f"ERROR: LEFT OFFSET Something wrong near point: {ileft}; idx: {j}")
+
+        try:
+            off_R = connectPolylines(firstWire_R, secondWire_R, iright)
+        except Exception as e:
+            raise Exception(f"ERROR: RIGHT OFFSET Something wrong near point: {iright}; idx: {j}. Exception: {e}")
+        
+        if off_R == None:
+            raise Exception(f"ERROR: RIGHT OFFSET Something wrong near point: {iright}; idx: {j}")
+        
+        # - discretize wires so they will have same count of vertices as source wire
+        offset_L = self.getWirepoints(off_L[0], edge.PointsCount) if edge.PointsCount > 1 else vectorsToArray([ileft[0]])
+        offset_R = self.getWirepoints(off_R[0], edge.PointsCount) if edge.PointsCount > 1 else vectorsToArray([iright[0]])
+
+        return (offset_L, offset_R, off_L[1], off_R[1])
+
     def getEdges(self, obj):
         '''
         Get left and right edges for object
@@ -663,21 +872,59 @@ class WireRoute(FoamCutBase.FoamCutBaseObject):
         else:
             return (None, None)
         
-    def getWirepoints(self, wire, num_points):
+    def simplifyRoute(self, obj, route_data, pointsCounts, points_L, points_R):
+        '''
+        Find route points which could be removed, keeping both sides within tolerance.
+        Only points of paths, projections and joins could be removed, 
+        boundaries of the route objects stay in place.
+        @param obj - route object
+        @param route_data - list of objects indexes
+        @param pointsCounts - count of route points for each data item
+        @param points_L - (N, 3) array of left route points
+        @param points_R - (N, 3) array of right route points
+        @return bool array of kept points
+        '''
+        anchors = np.ones(len(points_L), dtype=bool)
+
+        start = 0
+        for i, pointsCount in enumerate(pointsCounts):
+            end = min(start + pointsCount, len(points_L))
+            object = obj.Objects[route_data[i]]
+
+            # - last point of the object always stays
+            if object.Type in ["Path", "Projection", "Join"] and end - start > 1:
+                anchors[start:end - 1] = False
+            start = end
+
+        return simplifyPolylinePair(points_L, points_R, float(obj.SimplifyTolerance), anchors)
+
+    def getPlungePoint(self, point, safeHeight):
+        '''
+        Get point of plunge line at safe height
+        @param point - (3,) array of route point
+        @param safeHeight - safe height
+        @return (1, 3) array of plunge point
         '''
-        Make a Bspline from wire, discretize it with specified number of points
-        @param wire - wire to discretize
+        return np.array(((point[0], point[1], float(safeHeight)),))
+
+    def getPolyline(self, points):
+        '''
+        Make polyline from list of points
+        @param points - (N, 3) array of points
+        @return (N, 3) array of points or None if there are less than 2 points
+        '''
+        if len(points) < 2:
+            return None
+        return vectorsToArray(points)
+
+    def getWirepoints(self, points, num_points):
+        '''
+        Resample polyline by arc length with specified number of points, corners are kept
+        @param points - (N, 3) array of polyline points to discretize
         @param num_points - number of points
-        @return list of points 
+        @return (N, 3) array of points
         '''
-        if num_points == 2: # short strait line - no need to convert
-            return [wire.Vertexes[0].Point, wire.Vertexes[-1].Point]
-        
-        bs = Part.BSplineCurve()
-        bs.interpolate([v.Point for v in wire.Vertexes])
-        res = bs.discretize(Number=num_points)
-        
-        return res
+        return resamplePolyline(points, num_points)
     
     def detect_connection(first_line, second_line, first_reversed):
         f_end = first_line[START if first_reversed else END]
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+
+# - make workbench modules importable, tests are skipped if FreeCAD modules are not available
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
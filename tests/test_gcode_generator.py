@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+import math
+import pytest
+
+FreeCAD = pytest.importorskip("FreeCAD")
+import GcodeGenerator
+
+V = FreeCAD.Vector
+
+class Plain:
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+def makeConfig(**values):
+    config = Plain(CommentStyle="; Comment", X1AxisName="X", Z1AxisName="Y", X2AxisName="Z", Z2AxisName="A", R1AxisName="B",
+                   OriginX=10.0, FiveAxisMachine=True, FieldWidth=730.0, HorizontalTravel=550, VerticalTravel=300,
+                   BlockWidth=400, BlockLength=300, BlockHeight=50, BlockPosition=V(1, 2, 3),
+                   EnableHoming=False, EnableParking=False, StartProgramCode="", EndProgramCode="",
+                   WireMinPower=700, WireMaxPower=1000, DynamicWirePower=False,
+                   CutCommand="G01 {Position} F{FeedRate} {WirePower}", MoveCommand="G00 {Position} F{FeedRate}",
+                   PauseCommand="G04 P{Duration}", WireOnCommand="M03 S{WirePower}", WireOffCommand="M05",
+                   HomingCommand="$H", InitPositionCommand="G92 {Position}",
+                   FeedRateCut=7.0, FeedRateMove=30.0, FeedRateRotate=30.0, TimeUnits="Seconds", ParkX=10, ParkZ=290, ParkR1=0)
+    config.__dict__.update(values)
+    return config
+
+def makeRoute(label="Route", count=20):
+    '''
+    Route of rapid move to the start, cut along the circle arc and exit
+    '''
+    objects = [Plain(Type="Move", Label="Move", PointsCount=2, AddPause=False, RapidMove=True),
+               Plain(Type="Path", Label="Path", PointsCount=count, AddPause=False, RapidMove=False),
+               Plain(Type="Exit", Label="Exit", PointsCount=2, AddPause=False, RapidMove=False, LeadOutEnabled=False)]
+
+    points_l = [V(-365, 100, 50)]
+    points_r = [V(365, 100, 50)]
+    for i in range(count):
+        t = i / (count - 1) * math.pi
+        points_l.append(V(-365, 150 + 50 * math.cos(t), 50 + 50 * math.sin(t)))
+        points_r.append(V(365, 140 + 40 * math.cos(t), 50 + 40 * math.sin(t)))
+    points_l += [V(-365, 100, 60), V(-365, 100, 70)]
+    points_r += [V(365, 100, 60), V(365, 100, 70)]
+
+    return Plain(Type="Route", Label=label, JobName="Job", Offset_L=points_l, Offset_R=points_r,
+                 Data=[0, 1, 2], Objects=objects, FeedOverrides=[1.0, 1.0, 1.0])
+
+def generate(routes, config):
+    generator = GcodeGenerator.GcodeGenerator()
+    gcode = "".join(generator.generateGCODE(routes, config))
+    return (generator, gcode)
+
+def test_route_begin_rapid_is_counted():
+    route = makeRoute()
+    (unknown, _) = generate([route], makeConfig())
+    (parked, _) = generate([route], makeConfig(EnableParking=True))
+
+    # - with parking machine starts above the first point on parking height
+    first = route.Offset_L[0]
+    assert parked.routes_stats[0].RapidLengthLeft == pytest.approx(unknown.routes_stats[0].RapidLengthLeft + (290 - first.z))
+
+def test_next_route_begin_rapid_starts_from_previous_route_end():
+    first = makeRoute("First")
+    second = makeRoute("Second")
+    (generator, _) = generate([first, second], makeConfig())
+
+    end = first.Offset_L[-1]
+    start = second.Offset_L[0]
+    rapid = math.hypot(end.y - start.y, end.z - start.z)
+
+    assert generator.routes_stats[1].RapidLengthLeft == pytest.approx(generator.routes_stats[0].RapidLengthLeft + rapid)
+
+def test_feeds_are_planned_when_points_counts_do_not_match(monkeypatch):
+    warnings = []
+    monkeypatch.setattr(GcodeGenerator.App, "Console", Plain(PrintWarning=warnings.append, PrintError=warnings.append))
+
+    route = makeRoute("Mismatch")
+    route.PointsCounts = [2, 15, 2]
+    snapshot = GcodeGenerator.GcodeRouteSnapshot(route, makeConfig())
+
+    assert len(warnings) == 1 and "Mismatch" in warnings[0]
+    assert snapshot.Feeds is not None and len(snapshot.Feeds) == len(route.Offset_L)
+    assert (snapshot.Feeds > 0).all()
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+import math
+import pytest
+
+FreeCAD = pytest.importorskip("FreeCAD")
+import numpy as np
+import utilities
+
+V = FreeCAD.Vector
+
+SAMPLES = 20001     # - Count of samples of the curve used to measure arc length
+
+class CurveEdge:
+    '''
+    Edge of parametric curve with the same interface as Part.Edge used by discretization
+    '''
+    def __init__(self, curve, reverse = False):
+        self.ShapeType = "Edge"
+        self.Orientation = "Forward"
+        self.FirstParameter = 0.0
+        self.LastParameter = 1.0
+
+        parameters = np.linspace(0.0, 1.0, SAMPLES)
+        if reverse:
+            parameters = parameters[::-1]
+        self.curve = curve
+        self.reverse = reverse
+        self.samples = np.array([curve(t) for t in parameters])
+        self.lengths = np.append(0.0, np.cumsum(np.linalg.norm(np.diff(self.samples, axis=0), axis=1)))
+        self.Length = float(self.lengths[-1])
+
+    def hashCode(self):
+        return id(self)
+
+    def valueAt(self, t):
+        return V(*self.curve(1.0 - t if self.reverse else t))
+
+    def discretize(self, Number):
+        targets = np.linspace(0.0, self.Length, Number)
+        return [V(*[np.interp(target, self.lengths, self.samples[:, axis]) for axis in range(3)]) for target in targets]
+
+    def getFractions(self, points):
+        '''
+        Get arc length fractions of points lying on the edge, counted from the edge start
+        '''
+        indexes = [int(np.argmin(np.linalg.norm(self.samples - point, axis=1))) for point in points]
+        return self.lengths[indexes] / self.Length
+
+def makeCurve(x, scale):
+    # - curved start and nearly straight end, so adaptive steps are not symmetric
+    return lambda t: (x, 100.0 * scale * t, 30.0 * scale * math.sin(3.0 * math.pi * t) * (1.0 - t) ** 3)
+
+# - edges lay between working planes: first at 1/4 and second at 3/4 of distance between planes
+PLANES = [(np.array((-100.0, 0.0, 0.0)), np.array((1.0, 0.0, 0.0))), 
+          (np.array((100.0, 0.0, 0.0)), np.array((1.0, 0.0, 0.0)))]
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_adaptive_pair_points_have_same_fractions(reverse):
+    first = CurveEdge(makeCurve(-50.0, 1.0))
+    second = CurveEdge(makeCurve(50.0, 0.8), reverse)
+
+    (result, inverted, count) = utilities.makePathPointsByEdgesOrVerticesPair(first, second, PLANES, tolerance = 0.01, minStep = 0.1, maxStep = 5.0)
+
+    assert inverted == reverse
+    assert count == len(result[0]) == len(result[1])
+
+    # - points of edges, wire passes through them between points on working planes
+    left = utilities.vectorsToArray(result[0])
+    right = utilities.vectorsToArray(result[1])
+    fractions_first = first.getFractions(left + 0.25 * (right - left))
+    fractions_second = second.getFractions(left + 0.75 * (right - left))
+    if reverse:
+        fractions_second = 1.0 - fractions_second
+
+    assert np.abs(fractions_first - fractions_second).max() < 1e-3
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+import math
+import sys
+import pytest
+
+FreeCAD = pytest.importorskip("FreeCAD")
+import numpy as np
+import WireRoute
+
+V = FreeCAD.Vector
+
+class Plain:
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+def makePath(points_l, points_r, type, **values):
+    left = [V(*point) for point in points_l]
+    right = [V(*point) for point in points_r]
+    length = lambda points: sum(points[i].distanceToPoint(points[i + 1]) for i in range(len(points) - 1))
+
+    return Plain(Type=type, Label=type, Path_L=left, Path_R=right, PointsCount=len(left),
+                 LeftEdgeLength=length(left), RightEdgeLength=length(right), LeftSegmentLength=length(left), RightSegmentLength=length(right),
+                 CompensationDirection="Normal", AddPause=False, **values)
+
+def makeRouteObjects(count = 200):
+    '''
+    Objects of two cuts: enter, line, arc, line back and exit
+    '''
+    arc = [(50 + 20 * math.sin(t), 20 - 20 * math.cos(t)) for t in np.linspace(0, math.pi, count)]
+    objects = []
+    for i in range(2):
+        objects += [
+            makePath([(-200, 0, 60), (-200, 0, 0)], [(200, 0, 60), (200, 0, 0)], "Enter", LeadInEnabled=False, SafeHeight=60),
+            makePath([(-200, t, 0) for t in np.linspace(0, 50, count)], [(200, t * 0.8, 0) for t in np.linspace(0, 50, count)], "Path"),
+            makePath([(-200, y, z) for y, z in arc][::-1], [(200, y * 0.8, z * 0.8) for y, z in arc][::-1], "Path"),
+            makePath([(-200, 50 - t, 40) for t in np.linspace(0, 50, count)], [(200, (50 - t) * 0.8, 32) for t in np.linspace(0, 50, count)], "Path"),
+            makePath([(-200, 0, 40), (-200, 0, 60)], [(200, 0, 32), (200, 0, 60)], "Exit", LeadOutEnabled=False, SafeHeight=60)]
+    return objects
+
+def compensate(strategy):
+    doc = Plain(Name="Document", getObject=lambda name: Plain(Type="Job"))
+    obj = Plain(Document=doc, JobName="Job", Name="Route", Label="Route", Objects=makeRouteObjects(), 
+                KerfCompensation=0.5, CompensationStrategy=strategy, CompensationDirection="Normal", CompensationDegree=1.0, 
+                Simplify=False, SimplifyTolerance=0.01, Redraw=0)
+
+    route = object.__new__(WireRoute.WireRoute)
+    route.getEdges = lambda obj: (None, None)
+    route.execute(obj)
+
+    return np.hstack((WireRoute.vectorsToArray(obj.Offset_L), WireRoute.vectorsToArray(obj.Offset_R)))
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="worker processes are forked on Linux only")
+@pytest.mark.parametrize("strategy", ["Uniform", "Dynamic", "Dynamic per point"])
+def test_parallel_kerf_compensation_equals_serial(monkeypatch, strategy):
+    planes = ((np.array((-200.0, 0.0, 0.0)), np.array((1.0, 0.0, 0.0))), (np.array((200.0, 0.0, 0.0)), np.array((1.0, 0.0, 0.0))))
+    monkeypatch.setattr(WireRoute, "getWorkingPlanes", lambda job, doc: planes)
+    monkeypatch.setattr(WireRoute, "PARALLEL_KERF_MIN_POINTS", 0)
+
+    calls = []
+    def getWorkersCount(tasks):
+        calls.append(tasks)
+        return workers
+
+    monkeypatch.setattr(WireRoute, "getWorkersCount", getWorkersCount)
+
+    workers = 1
+    serial = compensate(strategy)
+    workers = 2
+    parallel = compensate(strategy)
+
+    assert calls == [2, 2]
+    assert np.array_equal(serial, parallel)
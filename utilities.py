@@ -9,8 +9,13 @@ import FreeCADGui
 Gui=FreeCADGui
 import Part
 import os
+import sys
 import math
+import hashlib
 from math import isclose
+import numpy as np
+import functools
+from collections import OrderedDict
 
 DEFAULT_CONFIG_PATH = "User parameter:BaseApp/Workbench/FoamcutWB/DefaultMachineConfig"
 
@@ -25,9 +30,24 @@ FC_TYPES_TO_ROUTE = ["Path", "Projection", "Rotation", "Enter", "Exit", "Move",
 
 FC_KERF_DIRECTIONS = ["Normal", "None", "Reversed"]
 FC_ROUTE_KERF_DIRECTIONS = ["Normal", "Reversed"]
-FC_KERF_STRATEGY = ["None", "Uniform", "Dynamic"]
+FC_KERF_STRATEGY = ["None", "Uniform", "Dynamic", "Dynamic per point"]
 FC_TIME_UNITS = ["Seconds", "Milliseconds"]
 FC_COMMENT_STYLES = ["; Comment", "(Comment)", "Ignore"]
+FC_FEED_MODES = ["Units per minute", "Inverse time"]
+
+EDGE_KEY_PRECISION = 6      # - Count of decimals used to quantize edge key coordinates
+EDGES_INDEXES_SIZE = 64             # - Max count of objects shapes edges indexes kept in cache
+EDGES_INDEXES = OrderedDict()       # - Least recently used edges indexes of objects shapes: (Document, Object) -> (shape hash, edges, index)
+
+DISCRETIZATION_CACHE_POINTS = 1000000   # - Max total count of points of discretized edges kept in cache
+DISCRETIZATION_CACHE = OrderedDict()    # - Least recently used discretized edges: (edge hash, orientation, edge key, count) -> points
+DISCRETIZATION_CACHE_COUNT = 0          # - Total count of points of discretized edges in cache
+
+OFFSET_MITER_LIMIT = 10.0       # - Max ratio of miter length to offset distance, sharper convex corners are beveled
+OFFSET_ARC_TOLERANCE = 1e-3     # - Max deviation of round join chords from arc
+GRID_MAX_CELLS = 16             # - Max count of grid cells covered by segment, bigger segments are compared with all segments directly
+POLYLINE_VERTEX_TOLERANCE = 1e-7    # - Points closer to polyline vertex are treated as vertex, same as OCC confusion tolerance
+RESAMPLE_CORNER_ANGLE = 10.0    # - Min turn angle (degrees) of polyline vertex kept as a corner by resampling
 
 def get_module_path():
     '''
@@ -51,39 +71,119 @@ def getIconPath(icon: str):
     '''
     return os.path.join(getResourcesPath(), "icons", icon)
 
+class ParameterStore:
+    '''
+    Cached parameters group of the workbench.
+    Group is loaded once and reloaded after it's changed outside (observer is attached to the group).
+    Defaults of missing parameters are written immediately or in one batch (see batchParameters)
+    '''
+    TYPES = ["Float", "Int", "Bool", "String"]
+    CONVERTERS = {"Float": float, "Int": int, "Bool": bool, "String": str}   # - defaults are converted to type of parameter
+
+    def __init__(self, path):
+        self.Path = path
+        self.Group = None
+        self.Values = None      # - type -> {name: value}
+        self.Pending = []       # - (type, name, value) defaults to write
+        self.Batch = 0          # - depth of nested batches
+        self.Writing = False    # - ignore notifications about own writes
+
+    def load(self):
+        if self.Group is None:
+            self.Group = App.ParamGet(self.Path)
+            self.Group.Attach(self)
+
+        self.Values = {}
+        for type in ParameterStore.TYPES:
+            getter = getattr(self.Group, "Get" + type)
+            self.Values[type] = {name: getter(name) for name in getattr(self.Group, "Get" + type + "s")()}
+
+    def get(self, type, name, default):
+        '''
+        Get parameter value, missing parameter is created with default value
+        @param type - parameter type: "Float" | "Int" | "Bool" | "String"
+        @param name - parameter name
+        @param default - default value
+        @returns parameter value
+        '''
+        if self.Values is None:
+            self.load()
+
+        values = self.Values[type]
+        if name not in values:
+            default = ParameterStore.CONVERTERS[type](default)
+            values[name] = default
+            self.Pending.append((type, name, default))
+            if self.Batch == 0:
+                self.flush()
+
+        return values[name]
+
+    def flush(self):
+        '''
+        Write pending defaults into parameters group
+        '''
+        if len(self.Pending) == 0 or self.Group is None:
+            return
+
+        self.Writing = True
+        try:
+            for (type, name, value) in self.Pending:
+                getattr(self.Group, "Set" + type)(name, value)
+        finally:
+            self.Writing = False
+        self.Pending = []
+
+    def onChange(self, group, name):
+        # - parameter changed outside, reload group on next request
+        if not self.Writing:
+            self.Values = None
+
+PARAMETERS = ParameterStore(DEFAULT_CONFIG_PATH)
+
+def batchParameters(function):
+    '''
+    Decorator, defaults of missing parameters requested by function are written in one batch when function returns
+    '''
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        PARAMETERS.Batch += 1
+        try:
+            return function(*args, **kwargs)
+        finally:
+            PARAMETERS.Batch -= 1
+            if PARAMETERS.Batch == 0:
+                PARAMETERS.flush()
+    return wrapper
+
 def getParameterFloat(name, default):
-    parameters = App.ParamGet(DEFAULT_CONFIG_PATH)
-    floats = parameters.GetFloats()
-    if name not in floats:
-        parameters.SetFloat(name, default)
-    
-    return parameters.GetFloat(name)
+    return PARAMETERS.get("Float", name, default)
 
 def getParameterInt(name, default):
-    parameters = App.ParamGet(DEFAULT_CONFIG_PATH)
-    ints = parameters.GetInts()
-    if name not in ints:
-        parameters.SetInt(name, default)
-    
-    return parameters.GetInt(name)
+    return PARAMETERS.get("Int", name, default)
 
 def getParameterBool(name, default):
-    parameters = App.ParamGet(DEFAULT_CONFIG_PATH)
-    bools = parameters.GetBools()
-    if name not in bools:
-        parameters.SetBool(name, default)
-    
-    return parameters.GetBool(name)
+    return PARAMETERS.get("Bool", name, default)
 
 def getParameterString(name, default):
-    parameters = App.ParamGet(DEFAULT_CONFIG_PATH)
-    strings = parameters.GetStrings()
-    if name not in strings:
-        parameters.SetString(name, default)
-    
-    return parameters.GetString(name)
+    return PARAMETERS.get("String", name, default)
+
+def getWorkersCount(tasks):
+    '''
+    Get count of worker processes for parallel computations.
+    Workers are forked, so parallel computations are available on Linux only. Forking of GUI process with running threads
+    could deadlock, so parallel computations are disabled by default and enabled by ParallelWorkers parameter
+    @param tasks - count of tasks
+    @returns count of workers, 1 means computations should be done in current process
+    '''
+    if tasks < 2 or not sys.platform.startswith("linux"):
+        return 1
 
-SUPPRESS_WARNINGS = getParameterBool("SuppressWarnings", True)
+    workers = getParameterInt("ParallelWorkers", 1)
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+
+    return min(workers, tasks)
 
 def isNewStateHandling():
     '''
@@ -136,14 +236,138 @@ def getEdgesLinks(obj, source):
     objects = []
     edges = source.Edges if issubclass(type(source), Part.Face) else source
 
+    (shape_edges, index) = getEdgesIndex(obj)
+
     for fe in edges:
-        for i, edge in enumerate(obj.Shape.Edges, start=1):
-            if fe.isEqual(edge):
-                objects.append([obj, ['Edge{}'.format(i)]])
-            edge.reverse()
-            if fe.isEqual(edge):
+        # - same key could be shared by coincident edges, so check candidates are same edge in any orientation
+        for i in index.get(getEdgeKey(fe), []):
+            if fe.isSame(shape_edges[i - 1]):
                 objects.append([obj, ['Edge{}'.format(i)]])
     return objects
+
+def getEdgeKey(edge):
+    '''
+    Get orientation independent key of edge by quantized end points, middle point and length
+    @param edge - Part.Edge
+    @returns tuple key
+    '''
+    def quantize(point):
+        return (round(point.x, EDGE_KEY_PRECISION), round(point.y, EDGE_KEY_PRECISION), round(point.z, EDGE_KEY_PRECISION))
+
+    first = quantize(edge.valueAt(edge.FirstParameter))
+    last = quantize(edge.valueAt(edge.LastParameter))
+    middle = quantize(edge.valueAt((edge.FirstParameter + edge.LastParameter) / 2))
+
+    return (min(first, last), max(first, last), middle, round(edge.Length, EDGE_KEY_PRECISION))
+
+def discretizeEdge(edge, count):
+    '''
+    Discretize edge into specified count of points.
+    Results are cached by edge geometry and count of points, so unchanged edges are not discretized on every recompute.
+    Cache is limited by total count of points, so few dense edges can not hold unbounded memory
+    @param edge - Part.Edge
+    @param count - count of points
+    @returns (N, 3) read only array of points
+    '''
+    global DISCRETIZATION_CACHE_COUNT
+    key = (edge.hashCode(), edge.Orientation, getEdgeKey(edge), int(count))
+
+    points = DISCRETIZATION_CACHE.get(key)
+    if points is not None:
+        DISCRETIZATION_CACHE.move_to_end(key)
+        return points
+
+    points = vectorsToArray(edge.discretize(Number=int(count)))
+    points.flags.writeable = False
+
+    DISCRETIZATION_CACHE[key] = points
+    DISCRETIZATION_CACHE_COUNT += len(points)
+
+    # - keep at least the last edge, even if it alone is bigger than the limit
+    while DISCRETIZATION_CACHE_COUNT > DISCRETIZATION_CACHE_POINTS and len(DISCRETIZATION_CACHE) > 1:
+        (_, evicted) = DISCRETIZATION_CACHE.popitem(last=False)
+        DISCRETIZATION_CACHE_COUNT -= len(evicted)
+
+    return points
+
+def discretizeEdgesAdaptive(edges, tolerance, minStep, maxStep, reversedEdges = None):
+    '''
+    Discretize edges together, so points of all edges stay in correspondence.
+    Points are placed at same arc length fractions on all edges, distance between points is adapted to curvature of edges,
+    so chord error h^2 * k / 8 stays within tolerance where the step limits allow it.
+    Fractions of reversed edges are counted from their end, so edges running in opposite directions are paired correctly
+    @param edges - list of Part.Edge
+    @param tolerance - max distance between edge and chord between points
+    @param minStep - min distance between points
+    @param maxStep - max distance between points
+    @param reversedEdges (optional) - list of flags, True if edge runs in opposite direction to the first edge
+    @returns list of (N, 3) arrays of points, one for each edge, points of each edge are in its own direction
+    '''
+    lengths = [float(edge.Length) for edge in edges]
+    if reversedEdges is None:
+        reversedEdges = [False] * len(edges)
+
+    # - dense discretization with min step, points are evenly distributed by arc length.
+    #   Reversed edges are walked from the end, so all edges have common direction
+    count = max(int(math.ceil(max(lengths) / minStep)) + 1, 3)
+    dense = [discretizeEdge(edge, count)[::-1] if reverse else discretizeEdge(edge, count) for edge, reverse in zip(edges, reversedEdges)]
+
+    # - max allowed step of each dense interval as fraction of edge length, the most curved edge wins
+    allowed = np.full(count - 1, np.inf)
+    for points, length in zip(dense, lengths):
+        if length <= 0:
+            continue
+
+        directions = np.diff(points, axis=0)
+        chords = np.linalg.norm(directions, axis=1)
+        directions[chords > 0] /= chords[chords > 0, None]
+        turns = np.arccos(np.clip(np.einsum("ij,ij->i", directions[:-1], directions[1:]), -1.0, 1.0))
+        curvature = turns / np.maximum((chords[:-1] + chords[1:]) / 2, 1e-12)
+        curvature = np.maximum(np.append(0.0, curvature), np.append(curvature, 0.0))
+
+        steps = np.clip(np.sqrt(8.0 * tolerance / np.maximum(curvature, 1e-12)), minStep, maxStep)
+        allowed = np.minimum(allowed, steps / length)
+
+    allowed = np.minimum(allowed, 1.0)
+
+    # - cumulative count of points along the edges, points are placed at its whole values
+    density = np.append(0.0, np.cumsum(1.0 / allowed / (count - 1)))
+    grid = np.linspace(0.0, 1.0, count)
+    targets = np.linspace(0.0, density[-1], max(int(math.ceil(density[-1])), 1) + 1)
+    fractions = np.interp(targets, density, grid)
+
+    result = [np.column_stack([np.interp(fractions, grid, points[:, axis]) for axis in range(3)]) for points in dense]
+    return [points[::-1] if reverse else points for points, reverse in zip(result, reversedEdges)]
+
+def getEdgesIndex(obj):
+    '''
+    Get index of object shape edges. Index is built once and rebuilt when object shape changes.
+    Only indexes of recently used objects are kept, so deleted objects and closed documents do not hold their shapes
+    @param obj - App.DocumentObject
+    @returns tuple (edges, index), where:
+        edges - list of shape edges;
+        index - dictionary edge key -> list of edge numbers (1 based)
+    '''
+    shape = obj.Shape
+    name = (obj.Document.Name, obj.Name)
+    shape_hash = shape.hashCode()
+
+    cached = EDGES_INDEXES.get(name)
+    if cached is not None and cached[0] == shape_hash:
+        EDGES_INDEXES.move_to_end(name)
+        return (cached[1], cached[2])
+
+    edges = shape.Edges
+    index = {}
+    for i, edge in enumerate(edges, start=1):
+        index.setdefault(getEdgeKey(edge), []).append(i)
+
+    EDGES_INDEXES[name] = (shape_hash, edges, index)
+    EDGES_INDEXES.move_to_end(name)
+    if len(EDGES_INDEXES) > EDGES_INDEXES_SIZE:
+        EDGES_INDEXES.popitem(last=False)
+
+    return (edges, index)
     
 def getAllSelectedEdges():
     '''
@@ -189,27 +413,233 @@ def isCommonPoint(first, second, tolerance = 0.01):
 
     return firstPoint.distanceToPoint(secondPoint) < tolerance
 
-def intersectLineAndPlane(v0, v1, plane):
+def getPlaneOriginAndNormal(plane):
     '''
-    Find point of intersection of line and plane
-    @param v0 - Fist line point
-    @param v1 - Second line point
-    @param plane - Plane
-    @returns App.Vector Point of intersection
+    Get point on plane and plane normal
+    @param plane - Plane or tuple (origin, normal)
+    @returns tuple (origin, normal) of (3,) arrays
     '''
-    # - Check is same points and move one of them along X axis to make able to make a line
-    if (v0.isEqual(v1, 0.01)):
-        v1.x += 1
-
-    # - Make line
-    edge  = Part.makeLine(v0, v1)
+    if isinstance(plane, tuple):
+        return (np.asarray(plane[0], dtype=float), np.asarray(plane[1], dtype=float))
 
     surface = plane.Shape.Surface if hasattr(plane, 'Shape') else plane.Surface
+
+    origin = np.array((surface.Position.x, surface.Position.y, surface.Position.z), dtype=float)
+    normal = np.array((surface.Axis.x, surface.Axis.y, surface.Axis.z), dtype=float)
+
+    return (origin, normal)
+
+def intersectLinesAndPlane(points0, points1, plane):
+    '''
+    Find points of intersection of lines and plane in one pass.
+    Closed form: p = p0 + t * (p1 - p0), where t = ((origin - p0) . n) / ((p1 - p0) . n)
+    @param points0 - (N, 3) array of first lines points
+    @param points1 - (N, 3) array of second lines points
+    @param plane - Plane or tuple (origin, normal)
+    @returns (N, 3) array of points of intersection
+    '''
+    (origin, normal) = getPlaneOriginAndNormal(plane)
+
+    points0 = np.asarray(points0, dtype=float).reshape(-1, 3)
+    direction = np.asarray(points1, dtype=float).reshape(-1, 3) - points0
+
+    # - Same points - use line along X axis, so point will be projected normal to working plane
+    same = np.einsum("ij,ij->i", direction, direction) <= 0.01 ** 2
+    direction[same] = (1.0, 0.0, 0.0)
+
+    denominator = direction @ normal
+    if np.any(np.abs(denominator) < 1e-12):
+        raise Exception("ERROR: Line is parallel to working plane, no intersection found.")
+
+    t = ((origin - points0) @ normal) / denominator
+
+    return points0 + t[:, None] * direction
+
+def vectorsToArray(points):
+    '''
+    Convert list of points to array
+    @param points - list of App.Vector or (N, 3) array
+    @returns (N, 3) array of coordinates
+    '''
+    if isinstance(points, np.ndarray):
+        return np.asarray(points, dtype=float).reshape(-1, 3)
+    return np.array([(p.x, p.y, p.z) for p in points], dtype=float).reshape(-1, 3)
+
+def getPointsKey(points):
+    '''
+    Get key of points coordinates, used to find out if points changed between recomputes
+    @param points - list of App.Vector or (N, 3) array of points or None
+    @returns hex digest of coordinates or None
+    '''
+    if points is None:
+        return None
+    data = np.ascontiguousarray(vectorsToArray(points))
+    return hashlib.blake2b(data.tobytes(), digest_size=16).hexdigest()
+
+def arrayToVectors(points):
+    '''
+    Convert array of coordinates to list of points
+    @param points - (N, 3) array of coordinates
+    @returns list of App.Vector
+    '''
+    return [App.Vector(x, y, z) for (x, y, z) in np.asarray(points, dtype=float).tolist()]
+
+def getRoutePointsCounts(route_data, objects):
+    '''
+    Get count of route points for each route data item.
+    First point of the item is the last point of previous one, so it counted only for the first item.
+    @param route_data - list of objects indexes (Route.Data)
+    @param objects - list of route objects (Route.Objects)
+    @returns list of points count for each data item
+    '''
+    counts = []
+    for i, object_index in enumerate(route_data):
+        object = objects[object_index]
+
+        if object.Type == "Rotation":
+            counts.append(0)
+            continue
+
+        count = object.PointsCount if (i == 0 or i == len(route_data) - 1 or object.Type == "Exit") else object.PointsCount - 1
+
+        if object.Type == "Enter" and object.LeadInEnabled:
+            count += 1
+
+        if object.Type == "Exit" and object.LeadOutEnabled:
+            count += 1
+
+        counts.append(count)
+
+    return counts
+
+def getObjectFeedRate(object, config, feed_override = 1.0):
+    '''
+    Get nominal cutting feed rate of route object
+    @param object - route object
+    @param config - machine config
+    @param feed_override - feed override of the object, applied if greater than 1
+    @returns feed rate
+    '''
+    feed = float(object.FeedRate) if hasattr(object, "FeedRate") and object.FeedRate > 0 else float(config.FeedRateCut)
+    if feed_override > 1.0:
+        feed = feed * feed_override
+    return feed
+
+def planFeedRates(points_l, points_r, feeds, limits):
+    '''
+    Plan feed rate of each move, so the longer side of the move travels with nominal feed rate 
+    and no axis exceeds its speed limit. Feed rate is given for the move of all axes, as controller applies it.
+    @param points_l - (N, 3) array of left points
+    @param points_r - (N, 3) array of right points
+    @param feeds - (N) array of nominal feed rates of moves to each point
+    @param limits - speed limits of X1, Z1, X2, Z2 axes, 0 - no limit
+    @returns (N) array of feed rates of moves to each point, first point keeps nominal feed rate
+    '''
+    feeds = np.array(feeds, dtype=float)
+    if len(feeds) < 2:
+        return feeds
+
+    # - machine axes moves: X1, Z1 on the left plane and X2, Z2 on the right plane
+    deltas = np.abs(np.diff(np.hstack((points_l[:, 1:], points_r[:, 1:])), axis=0))
+    lengths_l = np.hypot(deltas[:, 0], deltas[:, 1])
+    lengths_r = np.hypot(deltas[:, 2], deltas[:, 3])
+
+    durations = np.maximum(lengths_l, lengths_r) / feeds[1:]
+
+    limits = np.asarray(limits, dtype=float)
+    limited = limits > 0
+    if limited.any():
+        durations = np.maximum(durations, (deltas[:, limited] / limits[limited]).max(axis=1))
+
+    moving = durations > 0
+    feeds[1:][moving] = np.hypot(lengths_l, lengths_r)[moving] / durations[moving]
+
+    return feeds
+
+def getPointsToSegmentDistances(points, start, end):
+    '''
+    Get distances from points to segment
+    @param points - (N, 3) array of points
+    @param start - segment start point
+    @param end - segment end point
+    @returns (N) array of distances
+    '''
+    direction = end - start
+    length = np.dot(direction, direction)
+
+    if length == 0:
+        return np.linalg.norm(points - start, axis=1)
+
+    t = np.clip(np.dot(points - start, direction) / length, 0.0, 1.0)
+    return np.linalg.norm(points - (start + t[:, None] * direction), axis=1)
+
+def getPolylineLength(points, accurate = False):
+    '''
+    Get length of polyline
+    @param points - list of App.Vector or (N, 3) array of points
+    @param accurate (optional) - estimate length of smooth curve passing through points. Each segment is treated as chord of
+        an arc with turn angle averaged from its ends, corners sharper than RESAMPLE_CORNER_ANGLE stay strait. False by default
+    @returns length
+    '''
+    points = vectorsToArray(points)
+    if len(points) < 2:
+        return 0.0
+
+    chords = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    if not accurate or len(points) < 3:
+        return float(chords.sum())
+
+    directions = np.diff(points, axis=0)
+    directions[chords > 0] /= chords[chords > 0, None]
+    angles = np.arccos(np.clip(np.einsum("ij,ij->i", directions[:-1], directions[1:]), -1.0, 1.0))
+    angles[angles > math.radians(RESAMPLE_CORNER_ANGLE)] = 0.0
+
+    # - arc angle of each chord as average of turn angles at its ends
+    arcs = (np.append(angles, angles[-1]) + np.append(angles[0], angles)) / 2
+    half = arcs / 2
+    factors = np.ones(len(chords))
+    curved = half > 1e-9
+    factors[curved] = half[curved] / np.sin(half[curved])
+
+    return float((chords * factors).sum())
+
+def simplifyPolylinePair(points_l, points_r, tolerance, anchors):
+    '''
+    Paired Ramer-Douglas-Peucker simplification.
+    Point is removed only if both left and right points are within tolerance of simplified polylines,
+    so left and right points stay in pairs.
+    @param points_l - (N, 3) array of left points
+    @param points_r - (N, 3) array of right points
+    @param tolerance - max distance of removed points from simplified polylines
+    @param anchors - (N) bool array of points which should be kept
+    @returns (N) bool array of kept points
+    '''
+    keep = np.array(anchors, dtype=bool)
+    if len(keep) == 0:
+        return keep
     
-    # - Find point of intersection
-    point = surface.intersect(edge.Curve)[0][0]
-    
-    return App.Vector(point.X, point.Y, point.Z)
+    keep[START] = keep[END] = True
+
+    indexes = np.flatnonzero(keep)
+    stack = list(zip(indexes[:-1].tolist(), indexes[1:].tolist()))
+
+    while len(stack) > 0:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+
+        distances = np.maximum(
+            getPointsToSegmentDistances(points_l[start + 1:end], points_l[start], points_l[end]),
+            getPointsToSegmentDistances(points_r[start + 1:end], points_r[start], points_r[end]))
+        
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            index += start + 1
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+
+    return keep
 
 def getParallelEdgeLength(obj, planeX):
     '''
@@ -230,16 +660,11 @@ def getParallelEdgeLength(obj, planeX):
     xdir = App.Vector(0.0, 1.0, 0.0)
     plane = Part.makePlane(float(config.HorizontalTravel), float(config.VerticalTravel), App.Vector(planeX, float(-config.OriginX), 0), norm, xdir)
 
-    projected = []
-
-    for l, r in zip(left_points, right_points):
-        projected.append(intersectLineAndPlane(l, r, plane))
+    count = min(len(left_points), len(right_points))
+    projected = intersectLinesAndPlane(vectorsToArray(left_points[:count]), vectorsToArray(right_points[:count]), plane)
 
     # recalculate edges length
-    path = Part.BSplineCurve()
-    path.approximate(Points = projected, Continuity="C0")
-    
-    return float(path.length())
+    return getPolylineLength(projected)
 
 def getConfigByName(config, doc):
     '''
@@ -288,7 +713,30 @@ def getWorkingPlanes(group, doc):
     else:
         FreeCAD.Console.PrintError("ERROR:\n Parent Job not found.\n")
 
-def makePathByPointSets(first, second, planes, projection = False):
+def isPointsOrderInverted(first, second, planes):
+    '''
+    Check if second points set should be reversed to match first one.
+    Only start and end point pairs are projected in both orders, path is inverted
+    unless it is shorter in normal order on any of planes.
+    @param first - (N, 3) array of first points set
+    @param second - (N, 3) array of second points set
+    @param planes - list of planes
+    @returns True if second points set should be reversed
+    '''
+    ends_first = first[[START, END]]
+    ends_normal = second[[START, END]]
+    ends_inverted = second[[END, START]]
+
+    for plane in planes:
+        normal = intersectLinesAndPlane(ends_first, ends_normal, plane)
+        inverted = intersectLinesAndPlane(ends_first, ends_inverted, plane)
+
+        if np.linalg.norm(normal[END] - normal[START]) < np.linalg.norm(inverted[END] - inverted[START]):
+            return False
+
+    return True
+
+def makePathByPointSets(first, second, planes, projection = False, inverted = None):
     '''
     Make path on working planes by one or two sets of points
 
@@ -296,6 +744,7 @@ def makePathByPointSets(first, second, planes, projection = False):
     @param second - Second points set or None if projection is true
     @param planes - list of planes
     @param projection - optional, if set to True, only first points set will be used and will be projected normal to WPs
+    @param inverted - optional, True if second points set should be reversed to match first one. Detected by end points if None
     @return list of points of intersection for each plane
     '''
     # - Point sets must contain same number of point
@@ -310,56 +759,30 @@ def makePathByPointSets(first, second, planes, projection = False):
     result = []
     
     if projection:
+        first_points = vectorsToArray(first)
         for plane in planes:
-            plane_points = []
-            for point in first:
-                plane_points.append(FreeCAD.Vector(plane.Position.x, point.y, point.z))
-            result.append(plane_points)
-    else: 
-        pathsLength = []
-        
+            plane_points = first_points.copy()
+            plane_points[:, 0] = plane.Position.x
+            result.append(arrayToVectors(plane_points))
+    else:
+        first_points = vectorsToArray(first)
+        second_points = vectorsToArray(second)
+
         # try inverted edge only if we are working with edges, not with vertices
-        examineLength = len(first) > 1 and  len(second) > 1 and not projection
+        invert = inverted if inverted is not None else \
+            len(first) > 1 and len(second) > 1 and isPointsOrderInverted(first_points, second_points, planes)
+        if invert:
+            second_points = second_points[::-1]
 
         # - Intersect line by each point pair and each plane
-        for plane_index in range(len(planes)):
-            plane_points = []
-            for point_index in range(len(first)):            
-                plane_points.append(
-                    intersectLineAndPlane(first[point_index], second[point_index], planes[plane_index])
-                )
-            if examineLength:
-                pathsLength.append(plane_points[START].distanceToPoint(plane_points[END]))        
-            result.append(plane_points)
-
-        # check with one edge reversed
-        # if resulted length will be less then use this points order
-        if(examineLength):
-            resultInverted = []
-            pathsLengthInverted = []
-            # - Intersect line by each point pair and each plane
-            for plane_index in range(len(planes)):
-                plane_points = []
-                for point_index in range(len(first)):            
-                    plane_points.append(                
-                        intersectLineAndPlane(first[point_index], second[len(second) - point_index - 1], planes[plane_index])
-                    )
-                pathsLengthInverted.append(plane_points[START].distanceToPoint(plane_points[END]))    
-                resultInverted.append(plane_points)
-
-            invert = True
-
-            # if any edge from normal list shorter than same edge from inverted list - use normal list
-            for pathIndex in range(len(pathsLength)):
-                if pathsLength[pathIndex] < pathsLengthInverted[pathIndex]:
-                    invert = False
-                    break
-            
-            # - Done
-            return (resultInverted if invert else result, invert)
+        for plane in planes:
+            result.append(arrayToVectors(intersectLinesAndPlane(first_points, second_points, plane)))
+
+        # - Done
+        return (result, invert)
     return (result, False)
 
-def makePathPointsByEdgesOrVerticesPair(first, second, planes, step = 0.5, isStraitLine = False):    
+def makePathPointsByEdgesOrVerticesPair(first, second, planes, step = 0.5, isStraitLine = False, tolerance = 0.0, minStep = 0.05, maxStep = 5.0):    
     '''
     Make path on working planes by two edges or vertices
 
@@ -367,6 +790,9 @@ def makePathPointsByEdgesOrVerticesPair(first, second, planes, step = 0.5, isStr
     @param second - Second edge / vertex
     @param step (optional) - Distance between points in edge discretization. 0.5 by default
     @param isStraitLine (optional) - Indicate that both edges is stait lines, so we do not need to discretize em. False by default
+    @param tolerance (optional) - Max chord error of adaptive discretization. 0 by default - fixed step discretization is used
+    @param minStep (optional) - Min distance between points in adaptive discretization. 0.05 by default
+    @param maxStep (optional) - Max distance between points in adaptive discretization. 5.0 by default
     @returns tuple (result, inverted, points_count), where:
         result - set of resulted points; 
         inverted - indicate that edge was inverted;
@@ -391,21 +817,29 @@ def makePathPointsByEdgesOrVerticesPair(first, second, planes, step = 0.5, isStr
 
     first_set   = []
     second_set  = []
+    inverted    = None
 
     if isStraitLine:
         first_set = [first.firstVertex().Point, first.lastVertex().Point]
         second_set = [second.firstVertex().Point, second.lastVertex().Point]
         points_count = 2
+    elif tolerance > 0:
+        # - Orientation is resolved by end points before discretization, so points are paired from the same ends of edges
+        inverted = isPointsOrderInverted(discretizeEdge(first, 2), discretizeEdge(second, 2), planes)
+
+        # - Discretize edges together adaptively to curvature
+        (first_set, second_set) = discretizeEdgesAdaptive([first, second], tolerance, max(float(minStep), 1e-2), float(maxStep), [False, inverted])
+        points_count = len(first_set)
     else:        
         # - Discretize edges
-        first_set = first.discretize(Number=points_count)
-        second_set = second.discretize(Number=points_count)
+        first_set = discretizeEdge(first, points_count)
+        second_set = discretizeEdge(second, points_count)
 
     # - Make path
-    (result, inverted) = makePathByPointSets(first_set, second_set, planes)
+    (result, inverted) = makePathByPointSets(first_set, second_set, planes, inverted = inverted)
     return (result, inverted, points_count)
 
-def makePathPointsByEdgeOrVertex(first, planes, step = 0.5, isStraitLine = False):    
+def makePathPointsByEdgeOrVertex(first, planes, step = 0.5, isStraitLine = False, tolerance = 0.0, minStep = 0.05, maxStep = 5.0):    
     '''
     Make projected path on working planes by one edge or vertex
 
@@ -413,6 +847,9 @@ def makePathPointsByEdgeOrVertex(first, planes, step = 0.5, isStraitLine = False
     @param planes - working planes 
     @param step (optional) - Distance between points in edge discretization. 0.5 by default
     @param isStraitLine (optional) - Indicate that edge is stait line, so we do not need to discretize. False by default
+    @param tolerance (optional) - Max chord error of adaptive discretization. 0 by default - fixed step discretization is used
+    @param minStep (optional) - Min distance between points in adaptive discretization. 0.05 by default
+    @param maxStep (optional) - Max distance between points in adaptive discretization. 5.0 by default
     @returns tuple (result, inverted, points_count), where:
         result - set of resulted points; 
         inverted - indicate that edge was inverted;
@@ -433,360 +870,678 @@ def makePathPointsByEdgeOrVertex(first, planes, step = 0.5, isStraitLine = False
     if isStraitLine:
         first_set = [first.firstVertex().Point, first.lastVertex().Point]
         points_count = 2
+    elif tolerance > 0:
+        # - Discretize edge adaptively to curvature
+        (first_set,) = discretizeEdgesAdaptive([first], tolerance, max(float(minStep), 1e-2), float(maxStep))
+        points_count = len(first_set)
     else:        
         # - Discretize edge
-        first_set = first.discretize(Number=points_count)
+        first_set = discretizeEdge(first, points_count)
 
     # - Make path
     (result, _) = makePathByPointSets(first_set, None,  planes, True)
     return (result, False, points_count)
 
-def makeWire(points):
-    ''' 
-    Create wire from list of points
+def intersectOffsetLines(starts, ends, directions):
+    '''
+    Get vertices of offset polyline as intersections of consecutive offset lines
+    @param starts - (K, 2) array of offset segments start points
+    @param ends - (K, 2) array of offset segments end points
+    @param directions - (K, 2) array of offset segments unit directions
+    @returns (K + 1, 2) array of vertices
+    '''
+    vertices = np.empty((len(starts) + 1, 2))
+    vertices[0] = starts[0]
+    vertices[-1] = ends[-1]
+
+    if len(starts) > 1:
+        d1 = directions[:-1]
+        d2 = directions[1:]
+        w = starts[1:] - starts[:-1]
+        denominator = d1[:, 0] * d2[:, 1] - d1[:, 1] * d2[:, 0]
+
+        # - parallel lines - use point between offset segments
+        parallel = np.abs(denominator) < 1e-9
+        denominator[parallel] = 1.0
+        t = (w[:, 0] * d2[:, 1] - w[:, 1] * d2[:, 0]) / denominator
 
-    @param points - list of points
+        vertices[1:-1] = np.where(parallel[:, None], (ends[:-1] + starts[1:]) / 2, starts[:-1] + t[:, None] * d1)
+
+    return vertices
+
+def expandRanges(starts, counts):
     '''
-    if len(points) < 2:
-        return None
-    
-    edges = []
-    for i in range(len(points) - 1):
-        edges.append(Part.LineSegment(points[i], points[i+1]))
+    Concatenate ranges of integers
+    @param starts - (N) array of ranges starts
+    @param counts - (N) array of ranges lengths
+    @returns array of concatenated ranges [start, start + count)
+    '''
+    return np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
 
-    return Part.Wire([edge.toShape() for edge in edges])
+def getGridKeys(cells):
+    '''
+    Get keys of grid cells
+    @param cells - (N, 2) integer array of cells indices
+    @returns (N) array of keys
+    '''
+    return cells[:, 0] * 2**32 + (cells[:, 1] + 2**31)
 
-def makeLineOffsetByPoints(startPoint, endPoint, offset):
+def getGridEntries(low, high, cell_size):
     '''
-    Create offset wire
-    
-    @param startPoint - start point of the line
-    @param endPoint - end point of the line
-    @param offset - distance to offset, where: negative - offset to the left; 0 - no offset; positive - offset to the right.
-    
-    @return offset wire
+    Get cells of uniform grid covered by bounding boxes
+    @param low - (N, 2) array of boxes min points
+    @param high - (N, 2) array of boxes max points
+    @param cell_size - size of grid cell
+    @returns tuple (boxes, keys, large), where:
+        boxes - index of box for each entry;
+        keys - key of grid cell for each entry;
+        large - indices of boxes covering more than GRID_MAX_CELLS cells, they are not added to the grid
     '''
-    
-    direction = endPoint - startPoint
-    direction.normalize()
-    
-    perpendicular = direction.cross(App.Vector(1,0,0))
-    perpendicular.normalize()
-    
-    res_start = startPoint + float(offset) * perpendicular
-    res_end = endPoint + float(offset) * perpendicular
-    
-    return Part.Wire(Part.LineSegment(res_start, res_end).toShape())
+    low_cells = np.floor(low / cell_size).astype(np.int64)
+    spans = np.floor(high / cell_size).astype(np.int64) - low_cells + 1
+    cells_counts = spans[:, 0] * spans[:, 1]
+
+    large = np.nonzero(cells_counts > GRID_MAX_CELLS)[0]
+    small = np.nonzero(cells_counts <= GRID_MAX_CELLS)[0]
+
+    counts = cells_counts[small]
+    boxes = np.repeat(small, counts)
+    position = expandRanges(np.zeros(len(small), dtype=np.int64), counts)
+    width = spans[boxes, 1]
+    cells = low_cells[boxes] + np.column_stack((position // width, position % width))
 
-def makeLineOffset(wire, offset):
+    return (boxes, getGridKeys(cells), large)
+
+def getSegmentsCandidatePairs(starts, ends, cell_size = None):
     '''
-    Create offset wire
-    
-    @param wire - source wire (should be strait line, only start and end vertices will be used)
-    @param offset - distance to offset, where: negative - offset to the left; 0 - no offset; positive - offset to the right.
-    
-    @return offset wire
+    Get pairs of segments with overlapping bounding boxes. Segments are indexed by uniform grid,
+    so only segments sharing grid cells are compared
+    @param starts - (N, 2) array of segments start points
+    @param ends - (N, 2) array of segments end points
+    @param cell_size (optional) - size of grid cell. Median size of segments by default
+    @returns tuple (first, second) of arrays of segments indices, where first < second
+    '''
+    count = len(starts)
+    low = np.minimum(starts, ends)
+    high = np.maximum(starts, ends)
+
+    if cell_size is None:
+        cell_size = float(np.median(np.max(high - low, axis=1))) if count > 0 else 1.0
+    (segments, keys, large) = getGridEntries(low, high, max(cell_size, 1e-6))
+
+    order = np.lexsort((segments, keys))
+    keys = keys[order]
+    segments = segments[order]
+
+    # - pair every entry with following entries of the same cell
+    group_ends = np.append(np.flatnonzero(np.diff(keys)) + 1, len(keys))
+    following = np.repeat(group_ends, np.diff(np.append(0, group_ends))) - np.arange(len(keys)) - 1
+    first = [segments[np.repeat(np.arange(len(keys)), following)]]
+    second = [segments[expandRanges(np.arange(len(keys)) + 1, following)]]
+
+    for index in large:
+        overlapping = np.nonzero(np.all(low <= high[index], axis=1) & np.all(high >= low[index], axis=1))[0]
+        overlapping = overlapping[overlapping != index]
+        first.append(np.minimum(overlapping, index))
+        second.append(np.maximum(overlapping, index))
+
+    keys = np.unique(np.concatenate(first).astype(np.int64) * count + np.concatenate(second))
+
+    return (keys // count, keys % count)
+
+def intersectSegmentsPairs(starts, ends, first, second):
+    '''
+    Intersect pairs of segments
+    @param starts - (N, 2) array of segments start points
+    @param ends - (N, 2) array of segments end points
+    @param first - array of first segments indices
+    @param second - array of second segments indices
+    @returns tuple (first, second, t, u) of intersecting pairs, where t and u are parameters of intersection point on first and second segments
+    '''
+    r = ends[first] - starts[first]
+    s = ends[second] - starts[second]
+    w = starts[second] - starts[first]
+
+    denominator = r[:, 0] * s[:, 1] - r[:, 1] * s[:, 0]
+    valid = np.abs(denominator) > 1e-12
+    denominator[~valid] = 1.0
+    t = (w[:, 0] * s[:, 1] - w[:, 1] * s[:, 0]) / denominator
+    u = (w[:, 0] * r[:, 1] - w[:, 1] * r[:, 0]) / denominator
+
+    hits = valid & (t >= 0.0) & (t <= 1.0) & (u >= 0.0) & (u <= 1.0)
+
+    return (first[hits], second[hits], t[hits], u[hits])
+
+def getPolylineSelfIntersections(points):
+    '''
+    Get intersections of not adjacent segments of polyline
+    @param points - (N, 2) array of polyline points
+    @returns tuple (first, second, t, u) of arrays, where first and second are indices of intersecting segments (first < second),
+        t and u are parameters of intersection point on first and second segments
+    '''
+    starts = points[:-1]
+    ends = points[1:]
+    (first, second) = getSegmentsCandidatePairs(starts, ends)
+
+    not_adjacent = second > first + 1
+
+    return intersectSegmentsPairs(starts, ends, first[not_adjacent], second[not_adjacent])
+
+def getPolylinesIntersections(points1, points2):
+    '''
+    Get intersections of segments of two polylines
+    @param points1 - (N, 2) array of first polyline points
+    @param points2 - (M, 2) array of second polyline points
+    @returns tuple (first, second, t, u) of arrays, where first and second are indices of intersecting segments of first and second polylines,
+        t and u are parameters of intersection point on first and second segments
+    '''
+    count = len(points1) - 1
+    starts = np.vstack((points1[:-1], points2[:-1]))
+    ends = np.vstack((points1[1:], points2[1:]))
+    (first, second) = getSegmentsCandidatePairs(starts, ends)
+
+    between = (first < count) & (second >= count)
+    (first, second, t, u) = intersectSegmentsPairs(starts, ends, first[between], second[between])
+
+    return (first, second - count, t, u)
+
+def getPointsNearPolyline(points, polyline, distance):
+    '''
+    Find pairs of points and polyline segments closer than distance. Polyline segments are indexed by uniform grid,
+    so each point is compared with nearby segments only
+    @param points - (N, 2) array of points
+    @param polyline - (M, 2) array of polyline points
+    @param distance - max distance
+    @returns tuple (points_indices, segments_indices, distances, t) of arrays, where t is parameter of closest point on segment
+    '''
+    starts = polyline[:-1]
+    ends = polyline[1:]
+    low = np.minimum(starts, ends) - distance
+    high = np.maximum(starts, ends) + distance
+
+    cell_size = max(2 * distance, float(np.median(np.max(high - low, axis=1))) - 2 * distance, 1e-6)
+    (segments, keys, large) = getGridEntries(low, high, cell_size)
+
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    segments = segments[order]
+
+    # - pair every point with segments of its cell and with large segments
+    point_keys = getGridKeys(np.floor(points / cell_size).astype(np.int64))
+    first = np.searchsorted(keys, point_keys, side="left")
+    counts = np.searchsorted(keys, point_keys, side="right") - first
+    pairs_points = np.concatenate([np.repeat(np.arange(len(points)), counts)] + [np.arange(len(points))] * len(large))
+    pairs_segments = np.concatenate([segments[expandRanges(first, counts)]] + [np.full(len(points), index) for index in large])
+
+    direction = ends[pairs_segments] - starts[pairs_segments]
+    vectors = points[pairs_points] - starts[pairs_segments]
+    lengths = np.einsum("ij,ij->i", direction, direction)
+    lengths[lengths == 0] = 1.0
+    t = np.clip(np.einsum("ij,ij->i", vectors, direction) / lengths, 0.0, 1.0)
+    distances = np.linalg.norm(vectors - t[:, None] * direction, axis=1)
+
+    near = distances <= distance
+
+    return (pairs_points[near], pairs_segments[near], distances[near], t[near])
+
+def getPointsCloseToPolyline(points, polyline, distance):
     '''
-    start = wire.Vertexes[0].Point
-    end = wire.Vertexes[-1].Point
+    Check which points are closer to polyline than distance
+    @param points - (N, 2) array of points
+    @param polyline - (M, 2) array of polyline points
+    @param distance - distance to check
+    @returns (N) bool array
+    '''
+    (indices, _, distances, _) = getPointsNearPolyline(points, polyline, distance)
+
+    close = np.zeros(len(points), dtype=bool)
+    close[indices[distances < distance]] = True
+
+    return close
+
+def getPolylineTopology(points, segment, t):
+    '''
+    Get topology of point on polyline in the same way as distToShape reports it
+    @param points - (N, 3) array of polyline points
+    @param segment - index of segment
+    @param t - parameter of point on segment
+    @returns tuple (topo, index), where topo is "Vertex" (index of vertex) or "Edge" (index of segment)
+    '''
+    length = float(np.linalg.norm(points[segment + 1, 1:] - points[segment, 1:]))
+
+    if t * length <= POLYLINE_VERTEX_TOLERANCE:
+        return ("Vertex", segment)
+    if (1.0 - t) * length <= POLYLINE_VERTEX_TOLERANCE:
+        return ("Vertex", segment + 1)
+    return ("Edge", segment)
+
+def getPointOnPolyline(points, point):
+    '''
+    Find closest point on polyline
+    @param points - (N, 3) array of polyline points
+    @param point - (3) array of point coordinates
+    @returns tuple (distance, segment, t), where t is parameter of closest point on segment
+    '''
+    starts = points[:-1, 1:]
+    direction = points[1:, 1:] - starts
+    vectors = point[1:] - starts
+
+    lengths = np.einsum("ij,ij->i", direction, direction)
+    lengths[lengths == 0] = 1.0
+    t = np.clip(np.einsum("ij,ij->i", vectors, direction) / lengths, 0.0, 1.0)
+    distances = np.linalg.norm(vectors - t[:, None] * direction, axis=1)
+
+    segment = int(np.argmin(distances))
+    return (float(distances[segment]), segment, float(t[segment]))
+
+def getPolylinesClosestPoints(points1, points2):
+    '''
+    Find closest points of two not intersecting polylines.
+    Closest points of not intersecting segments always include vertex of one of them, so only vertices are checked against other polyline
+    @param points1 - (N, 3) array of first polyline points
+    @param points2 - (M, 3) array of second polyline points
+    @returns tuple (distance, (topo1, index1, point1), (topo2, index2, point2)), where topo and index are same as in getPolylineTopology
+    '''
+    # - distance between end of first polyline and start of second one is upper bound of distance
+    radius = float(np.linalg.norm(points1[-1, 1:] - points2[0, 1:]))
+
+    (vertices2, segments1, distances2, t1) = getPointsNearPolyline(points2[:, 1:], points1[:, 1:], radius)
+    (vertices1, segments2, distances1, t2) = getPointsNearPolyline(points1[:, 1:], points2[:, 1:], radius)
 
-    return makeLineOffsetByPoints(start, end, offset)
+    if len(distances1) > 0 and (len(distances2) == 0 or distances1.min() <= distances2.min()):
+        k = int(np.argmin(distances1))
+        (segment, t) = (segments2[k], t2[k])
+        point2 = points2[segment] + t * (points2[segment + 1] - points2[segment])
+        return (float(distances1[k]), ("Vertex", int(vertices1[k]), points1[vertices1[k]]), getPolylineTopology(points2, segment, t) + (point2,))
 
+    k = int(np.argmin(distances2))
+    (segment, t) = (segments1[k], t1[k])
+    point1 = points1[segment] + t * (points1[segment + 1] - points1[segment])
+    return (float(distances2[k]), getPolylineTopology(points1, segment, t) + (point1,), ("Vertex", int(vertices2[k]), points2[vertices2[k]]))
 
-def intersectWires(wire1, wire2, tolerance = 1e-4):
+def intersectPolylines(points1, points2, tolerance = 1e-4):
     '''
-    Check how wires intersect on a plane
+    Check how polylines intersect on a plane
     
-    @param wire1 - first wire
-    @param wire2 - second wire
+    @param points1 - (N, 3) array of first polyline points or None
+    @param points2 - (M, 3) array of second polyline points or None
 
-    @returns intersection of 2 wires as (intersection, wire1 mode, wire2 mode) where:
+    @returns intersection of 2 polylines as (intersection, points1 mode, points2 mode) where:
         - intersection is App.Vector() with coordinates of intersection
-        - wire1 mode - mode of intersection for wire1: "none" | "trim" | "extend" | "replace"
-        - wire2 mode - mode of intersection for wire2: "none" | "trim" | "extend" | "replace"
+        - points1 mode - mode of intersection for first polyline: "none" | "trim" | "extend" | "replace"
+        - points2 mode - mode of intersection for second polyline: "none" | "trim" | "extend" | "replace"
     '''
-    if wire1 is None and wire2 is None:
+    if points1 is None and points2 is None:
         raise Exception("At least one wire should be present")
 
-    # first wire is missing or single point
-    if wire1 is None and wire2 is not None:
-        return (wire2.Vertexes[0].Point, "none", "none")
-    # second wire is missing or single point
-    if wire2 is None and wire1 is not None:
-        return (wire1.Vertexes[-1].Point, "none", "none")
-    
-    # check if wires already intersect or close enough to be treated as intersected    
-    (dist, vectors, infos) = wire1.distToShape(wire2)
-    
-    (topo1, index1, param1, topo2, index2, param2) = infos[0]
-    (v1, v2) = vectors[0]
-    
-    
-    # wires are intersecting or close enough to be treated as intersecting
+    # first polyline is missing or single point
+    if points1 is None:
+        return (App.Vector(*points2[0].tolist()), "none", "none")
+    # second polyline is missing or single point
+    if points2 is None:
+        return (App.Vector(*points1[-1].tolist()), "none", "none")
+
+    (first, second, t, u) = getPolylinesIntersections(points1[:, 1:], points2[:, 1:])
+
+    if len(first) > 0:
+        # polylines intersect - use intersection which removes less of polylines
+        lengths1 = np.append(0.0, np.cumsum(np.linalg.norm(np.diff(points1[:, 1:], axis=0), axis=1)))
+        lengths2 = np.append(0.0, np.cumsum(np.linalg.norm(np.diff(points2[:, 1:], axis=0), axis=1)))
+        removed1 = lengths1[-1] - (lengths1[first] + t * (lengths1[first + 1] - lengths1[first]))
+        removed2 = lengths2[second] + u * (lengths2[second + 1] - lengths2[second])
+        k = int(np.argmin(removed1 + removed2))
+
+        dist = 0.0
+        point1 = points1[first[k]] + t[k] * (points1[first[k] + 1] - points1[first[k]])
+        (topo1, index1) = getPolylineTopology(points1, first[k], t[k])
+        (topo2, index2) = getPolylineTopology(points2, second[k], u[k])
+        point2 = point1
+    else:
+        (dist, (topo1, index1, point1), (topo2, index2, point2)) = getPolylinesClosestPoints(points1, points2)
+
+    # polylines are intersecting or close enough to be treated as intersecting
     # we can just use point of intersection as result
-    if math.isclose(0.0, dist, abs_tol=tolerance): 
-        # wires already connected in intersection point or close enough to be treated as connected
-        if topo1 == topo2 == "Vertex":       
-            return (v1, "none", "none")
-        #wires intersect, so just use first point of intersection as result. 
-        #If one wire has high curvature (is arc or circle, or even spline) we can get 2 or more points of intersection.
-        if topo1 == topo2 == "Edge":           
-            return (v1, "trim", "trim")
-        elif topo1 == "Vertex" and topo2 == "Edge":
-            # one wire edge is connected to another wire vertex. 
-            # need to trim edge to the vertex
-            return (v1, "none", "trim")
-        elif topo1 == "Edge" and topo2 == "Vertex":
-            # one wire edge is connected to another wire vertex. 
-            # need to trim edge to the vertex
-            return (v1, "trim", "none")
-        
-    # wire are not intersecting directly
+    if dist <= tolerance:
+        v1 = App.Vector(*point1.tolist())
+
+        # only end vertices of polylines stay untouched, inner vertices are trimmed as edges
+        last1 = topo1 == "Vertex" and index1 == len(points1) - 1
+        first2 = topo2 == "Vertex" and index2 == 0
+
+        return (v1, "none" if last1 else "trim", "none" if first2 else "trim")
+
+    # polylines are not intersecting directly
     # need to check if it's possible to connect them safely
-    else:          
-        # wires not intersect, so calculate intersection by using first wire last edge and second wire first edge
-        
-        # edge cases when intersection point on a wrong side of the edge
-        # we only can extend first edge forward and thim second edge backward
-        if topo1 == "Vertex" and topo2 == "Edge" and index1 == 0:
-            raise Exception(f"Intersection is outside of the acceptable range. {dist}, {vectors}, {infos}")
-        if topo2 == "Vertex" and topo1 == "Edge" and index2 != 0:
-            raise Exception(f"Intersection is outside of the acceptable range. {dist}, {vectors}, {infos}")
-
-        # find a wire to examine
-        if topo1 == "Vertex":
-            wire = wire2
-            idx = 0
-            isFirst = False
+
+    # edge cases when intersection point on a wrong side of the edge
+    # we only can extend first edge forward and thim second edge backward
+    if topo1 == "Vertex" and topo2 == "Edge" and index1 == 0:
+        raise Exception(f"Intersection is outside of the acceptable range. {dist}, {point1}, {point2}")
+    if topo2 == "Vertex" and topo1 == "Edge" and index2 != 0:
+        raise Exception(f"Intersection is outside of the acceptable range. {dist}, {point1}, {point2}")
+
+    # find a polyline to examine
+    if topo1 == "Vertex":
+        examined = points2
+        idx = 0
+        isFirst = False
+    else:
+        examined = points1
+        idx = len(points1) - 1
+        isFirst = True
+
+    # get segments to calculate intersection point
+    L1_end = index1 if topo1 == "Edge" else (len(points1) - 2 if index1 > 0 else 0)
+    L2_start = index2 if topo2 == "Edge" else (len(points2) - 2 if index2 > 0 else 0)
+
+    start1 = points1[L1_end]
+    dir1 = points1[L1_end + 1] - start1
+    start2 = points2[L2_start]
+    dir2 = points2[L2_start + 1] - start2
+
+    # the max distance between end points we can safelly split to introduce virtual intersection point
+    maxDistanceToSplit = float(np.linalg.norm(dir1[1:]) + np.linalg.norm(dir2[1:]))
+
+    middle = App.Vector(*((point1 + point2) / 2).tolist())
+
+    cos = np.dot(dir1[1:], dir2[1:]) / (np.linalg.norm(dir1[1:]) * np.linalg.norm(dir2[1:]))
+    angle = math.degrees(math.acos(max(-1.0, min(1.0, float(cos)))))
+    angle_tolerance = 2.0 # if angle between edges less than this value, we can treat lines as they are parallel
+
+    # calculate intersection point of 2 segments lines
+    denominator = dir1[1] * dir2[2] - dir1[2] * dir2[1]
+
+    if abs(denominator) <= 1e-12 * np.linalg.norm(dir1[1:]) * np.linalg.norm(dir2[1:]):
+        # polylines are parallel
+        # but if endpoints are in a right order and close enough we can add point between them
+        if topo1 == "Vertex" and topo2 == "Vertex" and index1 > index2 and dist <= maxDistanceToSplit:
+            return (middle, "replace", "replace") # special case when both polylines are nearly parallel -> endpoints will be replaced with a virtual intersection
         else:
-            wire = wire1
-            idx = len(wire1.Vertexes) - 1
-            isFirst = True
-
-        # get edges indices to calculate intersection point
-        L1_end_idx = index1 if topo1 == "Edge" else (-1 if topo1 == "Vertex" and index1 > 0 else 0)
-        L2_start_idx = index2 if topo2 == "Edge" else (-1 if topo2 == "Vertex" and index2 > 0 else 0)
-
-        # get edges to calculate intersection point
-        L1_end = wire1.Edges[L1_end_idx]
-        L2_start = wire2.Edges[L2_start_idx]
-
-        # the max distance between end points we can safelly split to introduce virtual intersection point
-        maxDistanceToSplit = (L1_end.Length + L2_start.Length)
-
-        # direction from start to end
-        dir1 = L1_end.lastVertex().Point.sub(L1_end.firstVertex().Point)
-        dir2 = L2_start.lastVertex().Point.sub(L2_start.firstVertex().Point)
-
-        angle = math.degrees(dir1.getAngle(dir2))
-        angle_tolerance = 2.0 # if angle between edges less than this value, we can treat lines as they are parallel
-        # print(f"Angle between edges: {math.degrees(dir1.getAngle(dir2))}")
-
-        # calculate intersection point of 2 edges
-        res = L1_end.Curve.intersectCC(L2_start.Curve)
-
-        if len(res) == 0:
-            # wires are parallel
-            # but if endpoints are in a right order and close enough we can add point between them
-            if topo1 == "Vertex" and topo2 == "Vertex" and index1 > index2 and dist <= maxDistanceToSplit:
-                intPoint = v1.add(v2).multiply(0.5) # use middle point between 2 vertices as intersection
-                return (intPoint, "replace", "replace") # special case when both wires are nearly parallel -> endpoints will be replaced with a virtual intersection
-            else:
-                raise Exception(f"Wires not intersect. Check offset direction. {dist}, {vectors}, {infos}")
+            raise Exception(f"Wires not intersect. Check offset direction. {dist}, {point1}, {point2}")
+
+    w = start2 - start1
+    s = (w[1] * dir2[2] - w[2] * dir2[1]) / denominator
+    intPoint = start1 + s * dir1
+
+    (distance, segment, t) = getPointOnPolyline(examined, intPoint)
+    (topo, index) = getPolylineTopology(examined, segment, t)
+
+    # intersection point is on polyline, so we can just trim segment to this point
+    # or it's close to the vertex, but still outside of the polyline - then we need to extend segment to this point
+    if distance <= tolerance:
+        if topo == "Vertex":
+            return (App.Vector(*intPoint.tolist()), "extend", "extend")
         else:
-            intPoint = App.Vector(res[0].X, res[0].Y, res[0].Z)
-            vertex = Part.Vertex(intPoint)
-
-            (distance, _, infos) = vertex.distToShape(wire)
-            (_, _, _, topo, index, _) = infos[0]
-
-            # intersection point is on wire, so we can just trim edge to this point
-            # or it's close to the vertex, but still outside of the wire - then we need to extend edge to this point
-            if math.isclose(0.0, distance, abs_tol=tolerance):
-                if topo == "Vertex":
-                    return (intPoint, "extend", "extend")
-                else:
-                    return (intPoint, "trim", "extend") if isFirst else (intPoint, "extend", "trim")
-            # intersection point is outside of wire
-            # we can decide on adding virtual intersection when angle between edges is small and distance is small too
-            elif (angle < angle_tolerance or angle > 360 - angle_tolerance) and dist <= maxDistanceToSplit:                
-                intPoint = v1.add(v2).multiply(0.5) # use middle point between 2 vertices as intersection
-                return (intPoint, "replace", "replace") # special case when both wires are nearly parallel
-            # intersection point is outside of wire
-            # we probably can extend edge to this point or wire may be consumed
-            else:                
-                if topo == "Vertex" and index != idx:
-                    # wires are nearly parallel and intersection point is outside of wire
-                    # so we cannot connect them without consuming one of wires
-                    # but if endpoints are in a right order and close enough we can add point between them
-                    if topo1 == "Vertex" and topo2 == "Vertex" and index >= idx and dist <= maxDistanceToSplit:
-                        intPoint = v1.add(v2).multiply(0.5) # use middle point between 2 vertices as intersection
-                        return (intPoint, "replace", "replace") # special case when both wires are nearly parallel
-                    
-                    else:
-                        v = Part.show(vertex, "Wrong Intersection Point") # debug point of wrong intersection
-                        v.ViewObject.PointSize = 6
-                        Part.show(L1_end, "Wrong Intersection Edge") # debug edge to which wrong intersection point belongs
-                        Part.show(L2_start, "Wrong Intersection Edge") # debug edge to which wrong intersection
-
-                        raise Exception(f"Intersection is outside of the acceptable range.\n Initial distance check: {dist}, {vectors}, {infos}\n  {distance}, {infos[0]}")
-                else:
-                    return (intPoint, "extend", "extend")
-
-def trimOrExtendWire(wire, point, mode, side):
-    '''
-    Extend/Trim wire to the point of intersection
+            return (App.Vector(*intPoint.tolist()), "trim", "extend") if isFirst else (App.Vector(*intPoint.tolist()), "extend", "trim")
+    # intersection point is outside of polyline
+    # we can decide on adding virtual intersection when angle between segments is small and distance is small too
+    elif angle < angle_tolerance and dist <= maxDistanceToSplit:
+        return (middle, "replace", "replace") # special case when both polylines are nearly parallel
+    # intersection point is outside of polyline
+    # we probably can extend segment to this point or polyline may be consumed
+    elif topo == "Vertex" and index != idx:
+        # polylines are nearly parallel and intersection point is outside of polyline
+        # so we cannot connect them without consuming one of polylines
+        # but if endpoints are in a right order and close enough we can add point between them
+        if topo1 == "Vertex" and topo2 == "Vertex" and index >= idx and dist <= maxDistanceToSplit:
+            return (middle, "replace", "replace") # special case when both polylines are nearly parallel
+        raise Exception(f"Intersection is outside of the acceptable range.\n Initial distance check: {dist}, {point1}, {point2}\n  {distance}, {intPoint}")
+
+    return (App.Vector(*intPoint.tolist()), "extend", "extend")
+
+def resamplePolyline(points, count, corner_angle = RESAMPLE_CORNER_ANGLE):
+    '''
+    Resample polyline to specified count of points evenly distributed by arc length.
+    Corners are kept as they are, so resampled polyline doesn't cut them
+    @param points - (N, 3) array of polyline points
+    @param count - count of resulted points
+    @param corner_angle (optional) - min turn angle in degrees of vertex kept as a corner. RESAMPLE_CORNER_ANGLE by default
+    @returns (count, 3) array of points
+    '''
+    points = vectorsToArray(points)
+
+    # - repeated points have no direction
+    segments = np.linalg.norm(np.diff(points, axis=0), axis=1)
+    points = points[np.append(True, segments > 1e-12)]
+    segments = segments[segments > 1e-12]
+
+    if count < 2 or len(points) < 2:
+        return np.repeat(points[:1], count, axis=0)
+
+    lengths = np.append(0.0, np.cumsum(segments))
+
+    # - turn angles of inner vertices, sharpest ones are kept if there are more corners than points
+    directions = np.diff(points, axis=0) / segments[:, None]
+    angles = np.degrees(np.arccos(np.clip(np.einsum("ij,ij->i", directions[:-1], directions[1:]), -1.0, 1.0)))
+    corners = np.nonzero(angles > corner_angle)[0] + 1
+    if len(corners) > count - 2:
+        corners = np.sort(corners[np.argsort(-angles[corners - 1], kind="stable")[:count - 2]])
+
+    # - split intervals between spans proportionally to their lengths, each span gets at least one interval
+    bounds = lengths[np.concatenate(([0], corners, [len(points) - 1]))]
+    spans = np.diff(bounds)
+    quota = spans / bounds[-1] * (count - 1)
+    intervals = np.maximum(np.floor(quota).astype(np.int64), 1)
+
+    remainder = count - 1 - intervals.sum()
+    if remainder > 0:
+        intervals[np.argsort(intervals - quota, kind="stable")[:remainder]] += 1
+    while intervals.sum() > count - 1:
+        intervals[np.argmin(np.where(intervals > 1, quota - intervals, np.inf))] -= 1
+
+    # - evenly distributed arc length positions in each span
+    fractions = expandRanges(np.zeros(len(spans), dtype=np.int64), intervals) / np.repeat(intervals, intervals)
+    targets = np.append(np.repeat(bounds[:-1], intervals) + fractions * np.repeat(spans, intervals), bounds[-1])
+
+    return np.column_stack([np.interp(targets, lengths, points[:, axis]) for axis in range(3)])
+
+def trimOrExtendPolyline(points, point, mode, side):
+    '''
+    Extend/Trim polyline to the point of intersection
     
-    :param wire: Wire to fix
+    :param points: (N, 3) array of polyline points
     :param point: Intersection point
     :param mode: Mode of operation ("none" | "trim" | "extend" | "replace")
-    :param side: Side of the wire to operate on ("start" | "end")
+    :param side: Side of the polyline to operate on ("start" | "end")
     '''
+    point = np.array((point.x, point.y, point.z), dtype=float)
 
-    if mode == "none":
-        return wire
-    elif mode == "trim":
-        vertex = Part.Vertex(point)
-        (_, _, infos) = vertex.distToShape(wire)
-        (_, _, _, topo2, index2, _) = infos[0]
+    if mode == "trim":
+        (_, segment, _) = getPointOnPolyline(points, point)
 
-        if topo2 != "Edge":            
-            raise Exception("Trim expected intersection on edge.")
-    
         if side == "start":
-            return trimWireStart(wire, index2, point)
+            rest = points[segment + 1:]
+            return np.vstack((point, rest)) if not np.allclose(rest[0], point, rtol=0.0, atol=1e-9) or len(rest) == 1 else rest
         else:
-            return trimWireEnd(wire, index2, point)
-        
+            rest = points[:segment + 1]
+            return np.vstack((rest, point)) if not np.allclose(rest[-1], point, rtol=0.0, atol=1e-9) or len(rest) == 1 else rest
+
     elif mode == "extend":
         if side == "start":
-            if not isCommonPoint(point, wire.Vertexes[0], tolerance=1e-6):
-                points = [point] + [v.Point for v in wire.Vertexes]
-                return makeWire(points)
+            if np.linalg.norm(points[0] - point) >= 1e-6:
+                return np.vstack((point, points))
         else:
-            if not isCommonPoint(point, wire.Vertexes[-1], tolerance=1e-6):
-                points = [v.Point for v in wire.Vertexes] + [point]
-                return makeWire(points)
-        return wire
-        
+            if np.linalg.norm(points[-1] - point) >= 1e-6:
+                return np.vstack((points, point))
+
     elif mode == "replace":
-        points = [v.Point for v in wire.Vertexes]
-        if side == "start":
-            points[0] = point
-        else:
-            points[-1] = point
-        return makeWire(points)
+        points = points.copy()
+        points[0 if side == "start" else -1] = point
+
+    return points
 
-def connectWires(o1_wire, o2_wire, intersection):
+def connectPolylines(points1, points2, intersection):
     '''
-    Extend/Trim offsets wires to the point of intersection
-    @param o1_wire - first offset wire
-    @param o2_wire - second offset wire
-    @param intersection - (point, wire1_mode, wire2_mode) - intersection point of 2 wires and what to do with it ->
+    Extend/Trim offsets polylines to the point of intersection
+    @param points1 - (N, 3) array of first offset polyline points
+    @param points2 - (M, 3) array of second offset polyline points
+    @param intersection - (point, mode1, mode2) - intersection point of 2 polylines and what to do with it ->
     ("none" | "trim" | "extend" | "replace")
     
-    @returns pair of wires
+    @returns pair of polylines
     '''
-    
-    (point, wire1_mode, wire2_mode) = intersection
-    
-    # Part.show(Part.Vertex(point), "Intersection Point") # debug point of intersection
-    return [trimOrExtendWire(o1_wire, point, wire1_mode, "end"), trimOrExtendWire(o2_wire, point, wire2_mode, "start")]
+    (point, mode1, mode2) = intersection
 
-def trimWireEnd(wire, index, point):
-    '''
-    trim wire at specified point from the end
-    @param wire - wire to trim
-    @param index - index of the edge where point lay
-    @param point - coordinates of trim point
-    @return new wire, where point is it's last vertex
+    return [trimOrExtendPolyline(points1, point, mode1, "end"), trimOrExtendPolyline(points2, point, mode2, "start")]
+
+def removeOffsetLoops(points, source, distance):
     '''
-    # no edges to trim - create new one from wire start point and point of intersection
-    if index == 0:
-        return Part.Wire(Part.LineSegment(wire.Edges[0].firstVertex().Point, point).toShape())
-    
-    edges = [wire.Edges[edge] for edge in range(0, index)]
-    if wire.Edges[index - 1].lastVertex().Point != point:
-        edges.append(Part.LineSegment(wire.Edges[index - 1].lastVertex().Point, point).toShape())
-    return Part.Wire(edges)
-    
-def trimWireStart(wire, index, point):
+    Remove loops of self intersecting offset polyline.
+    Loop is removed only when it comes closer to the source than offset distance, so crossings of the source itself are kept
+    @param points - (N, 3) array of offset polyline points
+    @param source - (M, 3) array of source polyline points
+    @param distance - offset distance or (M,) array of offset distances at source points
+    @returns (K, 3) array of offset polyline points
     '''
-    trim wire at specified point from the start
-    @param wire - wire to trim
-    @param index - index of the edge where point lay
-    @param point - coordinates of trim point
-    @return new wire, where point is it's first vertex
+    if len(points) < 4:
+        return points
+
+    (first, second, t, u) = getPolylineSelfIntersections(points[:, 1:])
+    if len(first) == 0:
+        return points
+
+    # - count of points closer to source than offset before each point
+    if np.ndim(distance) == 0:
+        close = getPointsCloseToPolyline(points[:, 1:], source[:, 1:], distance * (1.0 - 1e-6))
+    else:
+        # - variable offset is compared with offset at closest point of source segment
+        (indices, segments, distances, s) = getPointsNearPolyline(points[:, 1:], source[:, 1:], float(np.max(distance)))
+        local = distance[segments] * (1.0 - s) + distance[segments + 1] * s
+        close = np.zeros(len(points), dtype=bool)
+        close[indices[distances < local * (1.0 - 1e-6)]] = True
+    close_before = np.append(0, np.cumsum(close))
+
+    pieces = []
+    last = 0        # - first point not yet added to result
+    cut = None      # - (segment, parameter) of last cut, part of segment before it is removed
+    # - by first segment, the biggest loop first
+    for k in np.lexsort((-second, first)):
+        (i, j) = (first[k], second[k])
+        if i < last - 1 or (cut is not None and i == cut[0] and t[k] < cut[1]):
+            continue
+        if close_before[j + 1] - close_before[i + 1] == 0:
+            continue
+
+        point = points[i, 1:] + t[k] * (points[i + 1, 1:] - points[i, 1:])
+        pieces.append(points[last:i + 1])
+        pieces.append(np.array([[points[i, 0], point[0], point[1]]]))
+        last = j + 1
+        cut = (j, u[k])
+
+    pieces.append(points[last:])
+
+    return np.vstack(pieces)
+
+def offsetPolyline(points, offset, join = "miter", miter_limit = OFFSET_MITER_LIMIT, cleanup = True):
     '''
-    # last segment, create new one        
-    if index == len(wire.Edges) - 1:
-        return Part.Wire(Part.LineSegment(point, wire.Edges[-1].lastVertex().Point).toShape())
+    Create offset of open polyline lying on a working plane (offset is made in YZ plane)
+    
+    @param points - list of App.Vector or (N, 3) array of polyline points
+    @param offset - distance to offset, where: negative - offset to the left; 0 - no offset; positive - offset to the right.
+        Could be (N,) array of distances at polyline points, all distances should be on the same side
+    @param join (optional) - type of convex corners: "miter" | "round". "miter" by default
+    @param miter_limit (optional) - max ratio of miter length to offset, sharper convex corners are beveled. OFFSET_MITER_LIMIT by default
+    @param cleanup (optional) - remove loops of self intersecting offset. True by default
 
-    edges = [wire.Edges[edge] for edge in range(index + 1, len(wire.Edges))]
-    if point != wire.Edges[index].lastVertex().Point:
-        edges.insert(0, Part.LineSegment(point, wire.Edges[index].lastVertex().Point).toShape())
-    return Part.Wire(edges)
+    @returns (M, 3) array of offset polyline points
+    '''
+    points = np.array(vectorsToArray(points), dtype=float)
+    offsets = np.array(np.broadcast_to(np.asarray(offset, dtype=float), (len(points),)))
+
+    # - repeated points have no direction
+    if len(points) > 1:
+        keep = np.ones(len(points), dtype=bool)
+        keep[1:] = np.linalg.norm(np.diff(points[:, 1:], axis=0), axis=1) > 1e-9
+        points = points[keep]
+        offsets = offsets[keep]
+
+    if not np.any(offsets) or len(points) < 2:
+        return points
+
+    # - side of offset, distances of variable offset are on the same side
+    side = 1.0 if offsets.sum() > 0 else -1.0
+    variable = np.ptp(offsets) > 0
+
+    directions = np.diff(points[:, 1:], axis=0)
+    directions /= np.linalg.norm(directions, axis=1)[:, None]
+
+    # - positive offset is on the right side: direction x (1, 0, 0)
+    normals = np.column_stack((directions[:, 1], -directions[:, 0]))
+
+    starts = points[:-1, 1:] + offsets[:-1, None] * normals
+    ends = points[1:, 1:] + offsets[1:, None] * normals
+    segments = np.arange(len(directions))
+
+    # - variable offset lines are not parallel to source segments
+    if variable:
+        lines = ends - starts
+        lengths = np.linalg.norm(lines, axis=1)
+        valid = lengths > 1e-12
+        directions[valid] = lines[valid] / lengths[valid, None]
+
+    # - remove segments reversed by offset, so neighbour offset lines will be intersected directly
+    while True:
+        vertices = intersectOffsetLines(starts, ends, directions)
+        if len(segments) == 1:
+            break
+
+        collapsed = np.einsum("ij,ij->i", np.diff(vertices, axis=0), directions) < 0
+        if not collapsed.any():
+            break
+        if collapsed.all():
+            collapsed[np.argmax(np.linalg.norm(ends - starts, axis=1))] = False
+
+        starts = starts[~collapsed]
+        ends = ends[~collapsed]
+        directions = directions[~collapsed]
+        segments = segments[~collapsed]
+
+    # - X coordinate of vertices taken from source points
+    x = points[np.append(segments, segments[-1] + 1), 0]
+
+    # - convex corners need bevel or round join
+    d1 = directions[:-1]
+    d2 = directions[1:]
+    convex = (d1[:, 0] * d2[:, 1] - d1[:, 1] * d2[:, 0]) * side > 1e-9
+    cos_half = np.sqrt(np.clip((1.0 + np.einsum("ij,ij->i", d1, d2)) / 2.0, 0.0, 1.0))
+    if join == "round":
+        special = convex & (segments[1:] == segments[:-1] + 1)
+    else:
+        special = convex & (cos_half * miter_limit < 1.0)
+
+    result = np.column_stack((x, vertices))
+
+    if special.any():
+        pieces = []
+        last = 0
+        for i in np.nonzero(special)[0] + 1:
+            pieces.append(result[last:i])
+
+            if join == "round":
+                center = points[segments[i], 1:]
+                radius = abs(offsets[segments[i]])
+                a0 = math.atan2(*(side * normals[segments[i - 1]])[::-1])
+                sweep = math.atan2(*(side * normals[segments[i]])[::-1]) - a0
+                sweep = (sweep + math.pi) % (2 * math.pi) - math.pi
+                step = 2 * math.acos(max(-1.0, 1.0 - OFFSET_ARC_TOLERANCE / max(radius, OFFSET_ARC_TOLERANCE)))
+                angles = a0 + sweep * np.linspace(0.0, 1.0, max(int(math.ceil(abs(sweep) / step)), 1) + 1)
+                join_points = center + radius * np.column_stack((np.cos(angles), np.sin(angles)))
+            else:
+                join_points = np.array([ends[i - 1], starts[i]])
 
+            pieces.append(np.column_stack((np.full(len(join_points), x[i]), join_points)))
+            last = i + 1
+        pieces.append(result[last:])
+        result = np.vstack(pieces)
 
-def makeWireOffset(source, offset):
-        '''
-        Create offset wire
-        @param source - source wire
-        @param offset - distance to offset, where: negative - offset to the left; 0 - no offset; positive - offset to the right.
-        
-        @returns offset wire
-        '''
+    if cleanup:
+        result = removeOffsetLoops(result, points, np.abs(offsets) if variable else abs(offsets[0]))
 
-        if offset == 0:
-            return source
-        
-        if isStraitLine(source): # strait line     
-            wire = makeLineOffset(source, offset)                
-            return wire
-        else:
-            try:
-                offset1 = source.makeOffset2D(offset,2, False, True, True)
-                
-                wire = Part.Wire(offset1.Edges) # we need it to have sorted edges, it will help to operate with edges in a future
-
-                (_, _, infos)  = source.Vertexes[0].distToShape(wire)
-                (_, idx1, _, _, idx2, _) = infos[0]
-                if idx1 != idx2: #offset wire reversed, reverse edges
-                    wire = Part.Wire(offset1.Edges[::-1])
-            except Exception as ex:
-                #print("Source points: {}".format([v.Point for v in source.Vertexes]))
-                if not SUPPRESS_WARNINGS:
-                    App.Console.PrintWarning("Unable to create offset using makeOffset2D. Fallback to my calculation.\n {}".format(ex))
-
-                wires = []
-                for edge in source.Edges:
-                    wires.append(makeLineOffset(edge, offset))
-                
-                intersections = []
-                for i in range(len(wires) - 1):                
-                    intersections.append(intersectWires(wires[i], wires[i + 1]))
-
-                points = []
-                firstWire = None
-                for i in range(len(wires) - 1):
-                    if firstWire == None:
-                        firstWire = wires[i]
-                        
-                    (first, second) = connectWires(firstWire, wires[i + 1], intersections[i])
-                    
-                    for vi in range(len(first.Vertexes) - 1):
-                        points.append(first.Vertexes[vi].Point)
-                        
-                    firstWire = second
-
-                if firstWire is None:
-                    firstWire = wires[-1]
-                
-                for v in firstWire.Vertexes:
-                        points.append(v.Point)
-                wire = makeWire(points)
+    # - collapsed segments and bevels could leave repeated points
+    keep = np.ones(len(result), dtype=bool)
+    keep[1:] = np.linalg.norm(np.diff(result[:, 1:], axis=0), axis=1) > 1e-9
 
-        return wire
+    return result[keep]
 
 '''
   Enumeration for the pick style